@@ -2,20 +2,36 @@ from __future__ import annotations
 
 import io
 import os
-from typing import Iterable, List, Optional
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional
 
 from google.cloud import storage
 
+HTTP_POOL_SIZE = int(os.environ.get("GCS_HTTP_POOL_SIZE", 32))
 
+
+@lru_cache(maxsize=None)
 def _get_client(project_id: Optional[str] = None) -> storage.Client:
     """
-    Create a Google Cloud Storage client.
+    Return the process-wide Google Cloud Storage client for a project.
+
+    The client (and its pooled HTTP connections) is created on first use and
+    reused afterwards. In pre-forking servers, make the first call after fork.
 
     Relies on ADC (Application Default Credentials). Ensure one of the following:
     - `GOOGLE_APPLICATION_CREDENTIALS` points to a service account JSON key
     - `gcloud auth application-default login` has been run
     """
-    return storage.Client(project=project_id) if project_id else storage.Client()
+    import requests.adapters
+
+    client = storage.Client(project=project_id) if project_id else storage.Client()
+    # Allow as many concurrent connections as the server has request threads
+    adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    client._http.mount("https://", adapter)
+    client._http.mount("http://", adapter)
+    return client
 
 
 def upload_file(
@@ -45,16 +61,28 @@ def upload_bytes(
     *,
     project_id: Optional[str] = None,
     content_type: Optional[str] = None,
+    metadata: Optional[dict] = None,
+    if_generation_match: Optional[int] = None,
 ) -> str:
     """
     Upload in-memory bytes as an object to GCS.
 
+    Pass `if_generation_match=0` to only create the object if it does not exist yet;
+    the upload then raises `google.api_core.exceptions.PreconditionFailed` otherwise.
+
     Returns the gs:// URI of the uploaded object.
     """
     client = _get_client(project_id)
     bucket = client.bucket(bucket_name)
     blob = bucket.blob(destination_blob_name)
-    blob.upload_from_file(io.BytesIO(data), size=len(data), content_type=content_type)
+    if metadata:
+        blob.metadata = metadata
+    blob.upload_from_file(
+        io.BytesIO(data),
+        size=len(data),
+        content_type=content_type,
+        if_generation_match=if_generation_match,
+    )
     return f"gs://{bucket_name}/{destination_blob_name}"
 
 
@@ -93,6 +121,172 @@ def download_bytes(
     return blob.download_as_bytes()
 
 
+def iter_chunks(
+    bucket_name: str,
+    source_blob_name: str,
+    *,
+    chunk_size: int = 8 * 1024 * 1024,
+    generation: Optional[int] = None,
+    start: int = 0,
+    end: Optional[int] = None,
+    project_id: Optional[str] = None,
+) -> Iterator[bytes]:
+    """
+    Stream a GCS object as a sequence of byte chunks.
+
+    Each chunk is one ranged download of at most `chunk_size` bytes, so only
+    the requested bytes are fetched and one chunk is held in memory at a
+    time. Pass `generation` to read exactly that version of the object, and
+    `start`/`end` (inclusive, like HTTP ranges) to read part of it. When the
+    caller already knows the object size, passing `end` avoids the metadata
+    request otherwise made to find it.
+    """
+    client = _get_client(project_id)
+    bucket = client.bucket(bucket_name)
+    blob = bucket.blob(source_blob_name, generation=generation)
+    if end is None:
+        blob.reload()
+        end = blob.size - 1
+    position = start
+    while position <= end:
+        chunk_end = min(position + chunk_size, end + 1) - 1
+        # Checksums cover whole objects and cannot be verified per range
+        chunk = blob.download_as_bytes(start=position, end=chunk_end, checksum=None)
+        if not chunk:
+            break
+        position += len(chunk)
+        yield chunk
+
+
+class _UploadWriter:
+    """
+    BlobWriter wrapper that raises google.api_core exceptions.
+
+    BlobWriter sends upload requests through google-resumable-media, whose
+    errors (InvalidResponse) do not map to status-specific exceptions. This
+    wrapper re-raises them, so a failed precondition is PreconditionFailed.
+    """
+
+    def __init__(self, writer):
+        self._writer = writer
+
+    def write(self, data) -> int:
+        with _upload_errors():
+            return self._writer.write(data)
+
+    def close(self) -> None:
+        with _upload_errors():
+            self._writer.close()
+
+    def __getattr__(self, name):
+        return getattr(self._writer, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+@contextmanager
+def _upload_errors():
+    from google.api_core import exceptions
+    from google.resumable_media import InvalidResponse
+
+    try:
+        yield
+    except InvalidResponse as error:
+        response = error.response
+        raise exceptions.from_http_status(
+            response.status_code, f"{error}: {response.text}", response=response
+        ) from error
+
+
+def open_writer(
+    bucket_name: str,
+    destination_blob_name: str,
+    *,
+    content_type: Optional[str] = None,
+    chunk_size: int = 8 * 1024 * 1024,
+    if_generation_match: Optional[int] = None,
+    project_id: Optional[str] = None,
+):
+    """
+    Open a file-like writer that uploads to GCS in resumable chunks.
+
+    Data is sent every `chunk_size` bytes (a multiple of 256 KiB), so uploads
+    of any size use constant memory. The object is finalized on `close()`.
+    Failed requests raise google.api_core exceptions from `write()` or
+    `close()`, e.g. PreconditionFailed when `if_generation_match` is not met.
+
+    Returns (blob, writer).
+    """
+    client = _get_client(project_id)
+    bucket = client.bucket(bucket_name)
+    blob = bucket.blob(destination_blob_name)
+    writer = blob.open(
+        "wb",
+        chunk_size=chunk_size,
+        content_type=content_type,
+        if_generation_match=if_generation_match,
+    )
+    return blob, _UploadWriter(writer)
+
+
+def generate_signed_url(
+    bucket_name: str,
+    blob_name: str,
+    *,
+    method: str = "GET",
+    expiration_seconds: int = 900,
+    content_type: Optional[str] = None,
+    generation: Optional[int] = None,
+    project_id: Optional[str] = None,
+) -> str:
+    """
+    Create a V4 signed URL for reading (GET) or writing (PUT) an object.
+
+    Works with key-file credentials and with metadata-server credentials
+    (Cloud Run, GCE), which sign through the IAM signBlob API; the latter
+    needs the Service Account Token Creator role on itself.
+    """
+    from google.auth import credentials as auth_credentials
+    from google.auth.transport.requests import Request
+
+    client = _get_client(project_id)
+    blob = client.bucket(bucket_name).blob(blob_name, generation=generation)
+    signing_kwargs = {}
+    credentials = client._credentials
+    if not isinstance(credentials, auth_credentials.Signing):
+        if not credentials.valid:
+            credentials.refresh(Request())
+        signing_kwargs = {
+            "service_account_email": credentials.service_account_email,
+            "access_token": credentials.token,
+        }
+    return blob.generate_signed_url(
+        version="v4",
+        expiration=timedelta(seconds=expiration_seconds),
+        method=method,
+        content_type=content_type,
+        generation=generation,
+        **signing_kwargs,
+    )
+
+
+def object_exists(
+    bucket_name: str,
+    blob_name: str,
+    *,
+    project_id: Optional[str] = None,
+) -> bool:
+    """
+    Check whether an object exists.
+    """
+    client = _get_client(project_id)
+    return client.bucket(bucket_name).blob(blob_name).exists()
+
+
 def list_objects(
     bucket_name: str,
     prefix: str = "",
@@ -204,6 +398,10 @@ __all__ = [
     "upload_bytes",
     "download_file",
     "download_bytes",
+    "iter_chunks",
+    "open_writer",
+    "generate_signed_url",
+    "object_exists",
     "list_objects",
     "get_metadata",
     "delete_object",
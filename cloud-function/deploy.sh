@@ -6,10 +6,25 @@ set -e
 
 # Configuration
 PROJECT_ID=${PROJECT_ID:-"learn-cloud-473302"}
-FUNCTION_NAME="simple-text-function"
 REGION=${REGION:-"us-central1"}
 RUNTIME="python311"
-ENTRY_POINT="simple_text_processor"
+# Set TRIGGER_BUCKET to deploy process_gcs_text on object uploads instead of HTTP
+TRIGGER_BUCKET=${TRIGGER_BUCKET:-""}
+
+if [ -n "$TRIGGER_BUCKET" ]; then
+    FUNCTION_NAME=${FUNCTION_NAME:-"gcs-text-function"}
+    ENTRY_POINT=${ENTRY_POINT:-"process_gcs_text"}
+    TIMEOUT="540s"
+    # Analysis is CPU-bound; a full vCPU keeps multi-GB files inside the timeout
+    RESOURCE_ARGS="--memory=512Mi --cpu=1"
+    TRIGGER_ARGS="--trigger-event-filters=type=google.cloud.storage.object.v1.finalized --trigger-event-filters=bucket=$TRIGGER_BUCKET"
+else
+    FUNCTION_NAME=${FUNCTION_NAME:-"simple-text-function"}
+    ENTRY_POINT=${ENTRY_POINT:-"simple_text_processor"}
+    TIMEOUT="60s"
+    RESOURCE_ARGS="--memory=256MB"
+    TRIGGER_ARGS="--trigger-http --allow-unauthenticated"
+fi
 
 echo "🚀 Deploying Simple Cloud Function"
 echo "Project ID: $PROJECT_ID"
@@ -38,6 +53,17 @@ gcloud config set project $PROJECT_ID
 echo "🔧 Enabling required APIs..."
 gcloud services enable cloudfunctions.googleapis.com
 gcloud services enable cloudbuild.googleapis.com
+if [ -n "$TRIGGER_BUCKET" ]; then
+    gcloud services enable eventarc.googleapis.com
+fi
+
+# Ship the shared bucket-crud helpers with the function source
+echo "📦 Copying gcs_crud.py from ../bucket-crud..."
+cp ../bucket-crud/gcs_crud.py .
+
+# Ship the shared JSON provider, which lives in the Cloud Run service
+echo "📦 Copying json_provider.py from ../cloud-run..."
+cp ../cloud-run/json_provider.py .
 
 # Deploy the Cloud Function
 echo "🚀 Deploying Cloud Function..."
@@ -47,10 +73,9 @@ gcloud functions deploy $FUNCTION_NAME \
     --region=$REGION \
     --source=. \
     --entry-point=$ENTRY_POINT \
-    --trigger-http \
-    --allow-unauthenticated \
-    --memory=256MB \
-    --timeout=60s \
+    $TRIGGER_ARGS \
+    $RESOURCE_ARGS \
+    --timeout=$TIMEOUT \
     --max-instances=10
 
 # Get function URL
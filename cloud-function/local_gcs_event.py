@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Local test for the GCS-triggered text processing function
+Uploads a generated text file to a Cloud Storage emulator, then calls
+process_gcs_text with a fake "object finalized" CloudEvent, twice, to show the
+second (duplicate) delivery is skipped.
+
+Start the emulator first:
+    docker run -d -p 4443:4443 fsouza/fake-gcs-server -scheme http -port 4443
+    python local_gcs_event.py --size-mb 50
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault('STORAGE_EMULATOR_HOST', 'http://localhost:4443')
+
+from cloudevents.http import CloudEvent
+
+import main
+
+SAMPLE_LINE = ("2024-01-15T10:30:00Z INFO request served. The quick brown fox jumps over "
+               "the lazy dog! Readability formulas approximate reading difficulty.\n")
+
+
+def write_sample(path, size_mb):
+    line = SAMPLE_LINE.encode('utf-8')
+    with open(path, 'wb') as f:
+        for _ in range(size_mb * 1024 * 1024 // len(line) + 1):
+            f.write(line)
+
+
+def fake_event(bucket, name, metadata, event_id):
+    attributes = {
+        "type": "google.cloud.storage.object.v1.finalized",
+        "source": f"//storage.googleapis.com/projects/_/buckets/{bucket}",
+        "subject": f"objects/{name}",
+        "id": event_id,
+    }
+    data = {
+        "bucket": bucket,
+        "name": name,
+        "generation": str(metadata["generation"]),
+        "contentType": metadata["content_type"],
+        "size": str(metadata["size"]),
+    }
+    return CloudEvent(attributes, data)
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bucket', default='local-text-bucket')
+    parser.add_argument('--name', default='logs/sample.log')
+    parser.add_argument('--size-mb', type=int, default=10)
+    args = parser.parse_args()
+
+    gcs = main._gcs_crud()
+    client = gcs._get_client()
+    if client.lookup_bucket(args.bucket) is None:
+        client.create_bucket(args.bucket)
+
+    with tempfile.NamedTemporaryFile(suffix='.log', delete=False) as tmp:
+        sample_path = tmp.name
+    try:
+        write_sample(sample_path, args.size_mb)
+        print(f"Uploading {args.size_mb}MB sample to gs://{args.bucket}/{args.name}")
+        gcs.upload_file(args.bucket, args.name, sample_path, content_type='text/plain')
+    finally:
+        os.remove(sample_path)
+
+    metadata = gcs.get_metadata(args.bucket, args.name)
+    result_name = f"{main.RESULTS_PREFIX}{args.name}.{metadata['generation']}.json"
+
+    for attempt in (1, 2):
+        start = time.perf_counter()
+        main.process_gcs_text(fake_event(args.bucket, args.name, metadata, f"local-{attempt}"))
+        print(f"Delivery {attempt}: {time.perf_counter() - start:.2f}s")
+
+    print(f"\nResult gs://{args.bucket}/{result_name}:")
+    print(gcs.download_bytes(args.bucket, result_name).decode('utf-8'))
+
+
+if __name__ == "__main__":
+    run()
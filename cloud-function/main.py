@@ -3,50 +3,280 @@ Simple Cloud Function - Basic Text Processing
 This is a simple Cloud Function that demonstrates basic functionality
 """
 
-import json
+import logging
+import os
+import sys
+
 import functions_framework
+from flask import stream_with_context
+
+try:
+    from json_provider import dumps, json_response, loads, ndjson_response
+except ImportError:
+    # deploy.sh copies json_provider.py here; from the repository use the Cloud Run copy
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cloud-run'))
+    from json_provider import dumps, json_response, loads, ndjson_response
+from text_ops import StreamingAnalyzer, run_pipeline
+
+logger = logging.getLogger(__name__)
+
+# GCS trigger settings
+RESULTS_BUCKET = os.environ.get('RESULTS_BUCKET')  # defaults to the source bucket
+RESULTS_PREFIX = os.environ.get('RESULTS_PREFIX', 'text-results/')
+READ_CHUNK_SIZE = int(os.environ.get('READ_CHUNK_SIZE', 8 * 1024 * 1024))
+TEXT_SUFFIXES = tuple(os.environ.get('TEXT_SUFFIXES', '.txt,.log,.md,.csv,.json,.ndjson').split(','))
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type',
+    'Content-Type': 'application/json'
+}
+
+
+# Output fields a caller can select; only the requested ones are computed
+TEXT_FIELDS = {
+    "original_text": lambda text: text,
+    "character_count": len,
+    "word_count": lambda text: len(text.split()),
+    "uppercase": str.upper,
+    "lowercase": str.lower,
+    "reversed": lambda text: text[::-1],
+}
+# Batch results don't echo the input back by default
+BATCH_DEFAULT_FIELDS = [name for name in TEXT_FIELDS if name != "original_text"]
+
+
+def parse_fields(raw, default):
+    """Turn a comma-separated string or list of field names into a validated list"""
+    if raw is None:
+        return default
+    if isinstance(raw, str):
+        names = raw.split(',')
+    elif isinstance(raw, list) and all(isinstance(name, str) for name in raw):
+        names = raw
+    else:
+        raise ValueError("fields must be a comma-separated string or a list of field names")
+    names = [name.strip() for name in names if name.strip()]
+    unknown = [name for name in names if name not in TEXT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. "
+                         f"Available: {', '.join(TEXT_FIELDS)}")
+    return names or default
+
+
+def process_fields(text, fields):
+    """Compute only the requested fields for one text"""
+    return {name: TEXT_FIELDS[name](text) for name in fields}
+
+
+def iter_ndjson(stream):
+    """Yield (line number, parsed value or exception) without reading the whole body"""
+    for index, line in enumerate(stream):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield index, loads(line)
+        except ValueError as e:
+            yield index, e
+
+
+def batch_results(documents, fields):
+    """
+    Process documents one at a time.
+
+    Each document is a string or an object with "text" and an optional "id";
+    bad documents produce an error record instead of failing the batch.
+    """
+    for index, document in documents:
+        if isinstance(document, Exception):
+            yield {"id": index, "error": f"Invalid JSON: {document}"}
+            continue
+        if isinstance(document, dict):
+            doc_id, text = document.get("id", index), document.get("text")
+        else:
+            doc_id, text = index, document
+        if not isinstance(text, str) or not text:
+            yield {"id": doc_id, "error": "No text provided"}
+            continue
+        yield {"id": doc_id, **process_fields(text, fields)}
 
 
 @functions_framework.http
 def simple_text_processor(request):
     """
     Simple Cloud Function that processes text
+
+    Single mode: GET ?text=... or POST {"text": ...}
+    Batch mode:  POST a JSON array, {"documents": [...]} or an application/x-ndjson body;
+                 results are streamed back as NDJSON, one line per document.
+    Both modes accept "fields" (JSON list or ?fields=a,b) to select outputs.
     """
     # Set CORS headers
-    headers = {
-        'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-        'Access-Control-Allow-Headers': 'Content-Type',
-        'Content-Type': 'application/json'
-    }
-    
+    headers = dict(CORS_HEADERS)
+
     # Handle preflight requests
     if request.method == 'OPTIONS':
         return ('', 204, headers)
-    
+
     try:
+        # NDJSON batches are read line by line straight from the request body
+        if request.method == 'POST' and request.mimetype == 'application/x-ndjson':
+            fields = parse_fields(request.args.get('fields'), BATCH_DEFAULT_FIELDS)
+            results = batch_results(iter_ndjson(request.stream), fields)
+            return ndjson_response(request, stream_with_context(results), headers)
+
         # Get text from request
         if request.method == 'GET':
             text = request.args.get('text', '')
+            raw_fields = request.args.get('fields')
+        else:
+            request_json = request.get_json(silent=True) or {}
+            if isinstance(request_json, list):
+                request_json = {'documents': request_json}
+            elif not isinstance(request_json, dict):
+                return json_response(request, {"error": "Expected a JSON object or array"}, 400, headers)
+            raw_fields = request_json.get('fields', request.args.get('fields'))
+            documents = request_json.get('documents')
+            if isinstance(documents, list):
+                fields = parse_fields(raw_fields, BATCH_DEFAULT_FIELDS)
+                return ndjson_response(request, batch_results(enumerate(documents), fields), headers)
+            text = request_json.get('text', '')
+
+        if not isinstance(text, str) or not text:
+            return json_response(request, {"error": "No text provided"}, 400, headers)
+
+        fields = parse_fields(raw_fields, None)
+        if fields is None:
+            result = process_fields(text, TEXT_FIELDS)
+            result["message"] = "Text processed successfully!"
+        else:
+            result = process_fields(text, fields)
+
+        return json_response(request, result, 200, headers)
+
+    except ValueError as e:
+        return json_response(request, {"error": str(e)}, 400, headers)
+    except Exception as e:
+        return json_response(request, {"error": f"Error: {str(e)}"}, 500, headers)
+
+
+@functions_framework.http
+def process_text(request):
+    """
+    Run text operations (analysis, transform, validate, readability or all)
+
+    GET ?text=...&operation=analysis,readability&transform_type=uppercase
+    POST {"text": ..., "operation": ..., "transform_type": ...}
+    """
+    headers = dict(CORS_HEADERS)
+
+    if request.method == 'OPTIONS':
+        return ('', 204, headers)
+
+    try:
+        if request.method == 'GET':
+            params = request.args
         else:
-            request_json = request.get_json(silent=True)
-            text = request_json.get('text', '') if request_json else ''
-        
-        if not text:
-            return (json.dumps({"error": "No text provided"}), 400, headers)
-        
-        # Simple text processing
-        result = {
-            "original_text": text,
-            "character_count": len(text),
-            "word_count": len(text.split()),
-            "uppercase": text.upper(),
-            "lowercase": text.lower(),
-            "reversed": text[::-1],
-            "message": "Text processed successfully!"
-        }
-        
-        return (json.dumps(result), 200, headers)
-        
+            params = request.get_json(silent=True) or {}
+            if not isinstance(params, dict):
+                return json_response(request, {"error": "Expected a JSON object"}, 400, headers)
+
+        text = params.get('text', '')
+        if not isinstance(text, str) or not text:
+            return json_response(request, {"error": "No text provided"}, 400, headers)
+
+        operation = params.get('operation', 'analysis')
+        pipeline = run_pipeline(text, operation, {'transform_type': params.get('transform_type')})
+
+        return json_response(request, {
+            "operation": operation,
+            "text_length": len(text),
+            **pipeline,
+        }, 200, headers)
+
+    except ValueError as e:
+        return json_response(request, {"error": str(e)}, 400, headers)
     except Exception as e:
-        return (json.dumps({"error": f"Error: {str(e)}"}), 500, headers)
\ No newline at end of file
+        return json_response(request, {"error": f"Error: {str(e)}"}, 500, headers)
+
+
+def _gcs_crud():
+    """
+    Import the shared bucket-crud helpers.
+
+    deploy.sh copies gcs_crud.py next to this file; when running from the
+    repository the sibling bucket-crud directory is used instead.
+    """
+    try:
+        import gcs_crud
+    except ImportError:
+        sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bucket-crud'))
+        import gcs_crud
+    return gcs_crud
+
+
+def is_text_object(name, content_type):
+    return (content_type or '').startswith('text/') or name.lower().endswith(TEXT_SUFFIXES)
+
+
+@functions_framework.cloud_event
+def process_gcs_text(cloud_event):
+    """
+    Analyze a text object when it is finalized in a bucket
+
+    The object is streamed in READ_CHUNK_SIZE chunks, so its size is not limited
+    by instance memory. Results are written with a single create-only upload to
+    RESULTS_PREFIX/<name>.<generation>.json, which makes the function idempotent:
+    redelivered events for the same generation are skipped.
+    """
+    from google.api_core.exceptions import NotFound, PreconditionFailed
+
+    gcs = _gcs_crud()
+    data = cloud_event.data
+    bucket = data['bucket']
+    name = data['name']
+    generation = int(data['generation'])
+    results_bucket = RESULTS_BUCKET or bucket
+
+    if name.startswith(RESULTS_PREFIX) or not is_text_object(name, data.get('contentType')):
+        logger.info("Skipping gs://%s/%s", bucket, name)
+        return
+
+    result_name = f"{RESULTS_PREFIX}{name}.{generation}.json"
+    if gcs.object_exists(results_bucket, result_name):
+        logger.info("Already processed gs://%s/%s#%s", bucket, name, generation)
+        return
+
+    analyzer = StreamingAnalyzer()
+    # The event carries the size of this generation; passing it skips a metadata request
+    end = int(data['size']) - 1 if data.get('size') is not None else None
+    try:
+        for chunk in gcs.iter_chunks(bucket, name, chunk_size=READ_CHUNK_SIZE,
+                                     generation=generation, end=end):
+            analyzer.feed(chunk)
+    except NotFound:
+        # Overwritten or deleted since the event fired; a newer event covers it
+        logger.warning("gs://%s/%s#%s no longer exists", bucket, name, generation)
+        return
+
+    payload = {
+        "source": f"gs://{bucket}/{name}",
+        "generation": generation,
+        "event_id": cloud_event['id'],
+        **analyzer.close(),
+    }
+    try:
+        gcs.upload_bytes(
+            results_bucket,
+            result_name,
+            dumps(payload),
+            content_type='application/json',
+            metadata={'source-generation': str(generation)},
+            if_generation_match=0,
+        )
+    except PreconditionFailed:
+        logger.info("Concurrent delivery already wrote %s", result_name)
+        return
+    logger.info("Wrote gs://%s/%s", results_bucket, result_name)
@@ -0,0 +1,447 @@
+"""
+Text operation pipeline for the Cloud Function
+Operations register themselves by name and share one TextContext per request,
+so the text is tokenized once and word, sentence and syllable counts come from
+a single pass. Results are cached by content hash in a bounded LRU that lives
+in module scope and therefore survives warm invocations.
+
+Environment variables:
+- TEXT_CACHE_SIZE: cached (text, operation) results to keep (default 256; 0 disables)
+- TEXT_CACHE_MAX_CHARS: longer texts are processed but not cached (default 100000)
+- TEXT_CACHE_MAX_BYTES: approximate memory the cached results may hold (default 16 MiB)
+"""
+
+import codecs
+import hashlib
+import os
+import re
+import string
+import sys
+import threading
+from collections import Counter, OrderedDict
+from functools import cached_property, lru_cache
+
+CACHE_SIZE = int(os.environ.get('TEXT_CACHE_SIZE', 256))
+CACHE_MAX_CHARS = int(os.environ.get('TEXT_CACHE_MAX_CHARS', 100000))
+CACHE_MAX_BYTES = int(os.environ.get('TEXT_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+
+# Words, allowing inner apostrophes
+WORD_RE = re.compile(r"[^\W_]+(?:['’][^\W_]+)*")
+# A sentence: a word character, anything but a terminator, then a run of terminators
+SENTENCE_RE = re.compile(r"[^\W_][^.!?]*[.!?]+")
+TERMINATOR_RE = re.compile(r"[.!?]")
+WORD_CHAR_RE = re.compile(r"[^\W_]")
+
+# ASCII fast path: map everything but letters, digits and apostrophes to spaces
+# and lowercase, so bytes.split() yields candidate words without a regex scan
+_ASCII_WORD_BYTES = frozenset((string.ascii_letters + string.digits + "'").encode('ascii'))
+_ASCII_WORD_TABLE = bytes(
+    byte if byte in _ASCII_WORD_BYTES else 0x20 for byte in range(256)
+).translate(bytes.maketrans(string.ascii_uppercase.encode('ascii'), string.ascii_lowercase.encode('ascii')))
+# Every ASCII character for which str.isspace() is true
+_ASCII_SPACE = bytes(byte for byte in range(128) if chr(byte).isspace())
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+URL_RE = re.compile(r"https?://\S+", re.IGNORECASE)
+VOWEL_GROUPS_RE = re.compile(r"[aeiouy]+")
+
+OPERATIONS = {}
+
+
+def register(name, params=()):
+    """
+    Register an operation under name.
+
+    params lists the request parameters the operation reads; they become
+    part of its cache key.
+    """
+    def decorator(func):
+        OPERATIONS[name] = (func, tuple(params))
+        return func
+    return decorator
+
+
+def count_non_space(text: str) -> int:
+    """Characters in text that are not whitespace"""
+    if text.isascii():
+        return len(text.encode('ascii').translate(None, _ASCII_SPACE))
+    return len(''.join(text.split()))
+
+
+def word_counts(text: str):
+    """Return (lowercased word frequencies, letters in those words) for text"""
+    if not text.isascii():
+        words = WORD_RE.findall(text)
+        return Counter(map(str.lower, words)), len(''.join(words))
+    counts = Counter()
+    for token, count in Counter(text.encode('ascii').translate(_ASCII_WORD_TABLE).split()).items():
+        word = token.decode('ascii')
+        if "'" in word:
+            # Only inner apostrophes belong to a word; re-split the rare tokens that have one
+            for part in WORD_RE.findall(word):
+                counts[part] += count
+        else:
+            counts[word] += count
+    return counts, sum(len(word) * count for word, count in counts.items())
+
+
+@lru_cache(maxsize=65536)
+def count_syllables(word: str) -> int:
+    """Heuristic English syllable count: vowel groups minus a silent final 'e'"""
+    word = word.lower()
+    count = len(VOWEL_GROUPS_RE.findall(word))
+    if word.endswith('e') and not word.endswith(('le', 'ee')) and count > 1:
+        count -= 1
+    return max(count, 1)
+
+
+class TokenStats:
+    """
+    Word, sentence and syllable counts; text may be added in pieces.
+
+    Each piece is tokenized with a few C-level scans instead of a per-token
+    loop, and syllables are counted once per distinct word in the piece.
+    """
+
+    def __init__(self):
+        self.word_count = 0
+        self.sentence_count = 0
+        self.syllable_count = 0
+        self.polysyllable_count = 0
+        self.letter_count = 0
+        self.frequencies = Counter()
+        # Words seen since the last sentence terminator
+        self._open_sentence = False
+
+    def add(self, text: str) -> 'TokenStats':
+        """Count the tokens in text; pieces must be split between words"""
+        counts, letters = word_counts(text)
+        if not counts:
+            if self._open_sentence and TERMINATOR_RE.search(text):
+                self.sentence_count += 1
+                self._open_sentence = False
+            return self
+
+        self.letter_count += letters
+        self.frequencies.update(counts)
+        for word, count in counts.items():
+            self.word_count += count
+            syllables = count_syllables(word)
+            self.syllable_count += syllables * count
+            if syllables >= 3:
+                self.polysyllable_count += count
+
+        # A sentence left open by the previous piece ends at this piece's first
+        # terminator if no word comes before it
+        first_terminator = TERMINATOR_RE.search(text)
+        if (self._open_sentence and first_terminator is not None
+                and first_terminator.start() < WORD_CHAR_RE.search(text).start()):
+            self.sentence_count += 1
+        self.sentence_count += len(SENTENCE_RE.findall(text))
+        last_terminator = max(text.rfind('.'), text.rfind('!'), text.rfind('?'))
+        if last_terminator < 0:
+            self._open_sentence = True
+        else:
+            self._open_sentence = WORD_CHAR_RE.search(text, last_terminator + 1) is not None
+        return self
+
+    def finish(self) -> 'TokenStats':
+        """Count a trailing sentence that has no closing punctuation"""
+        if self._open_sentence:
+            self.sentence_count += 1
+            self._open_sentence = False
+        return self
+
+
+class TextContext:
+    """Per-request view of a text; every derived value is computed at most once"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    @cached_property
+    def stats(self) -> TokenStats:
+        return TokenStats().add(self.text).finish()
+
+
+def analysis_result(stats: TokenStats, character_count, non_space_count, line_count) -> dict:
+    return {
+        'character_count': character_count,
+        'character_count_no_spaces': non_space_count,
+        'word_count': stats.word_count,
+        'sentence_count': stats.sentence_count,
+        'syllable_count': stats.syllable_count,
+        'line_count': line_count,
+        'unique_words': len(stats.frequencies),
+        'average_word_length': round(stats.letter_count / stats.word_count, 2) if stats.word_count else 0,
+        'average_sentence_length': (round(stats.word_count / stats.sentence_count, 2)
+                                    if stats.sentence_count else 0),
+        'most_common_words': stats.frequencies.most_common(5),
+    }
+
+
+def _reading_level(score: float) -> str:
+    for threshold, level in ((90, 'very easy'), (70, 'easy'), (60, 'standard'),
+                             (50, 'fairly difficult'), (30, 'difficult')):
+        if score >= threshold:
+            return level
+    return 'very difficult'
+
+
+def readability_result(stats: TokenStats) -> dict:
+    words = stats.word_count
+    sentences = stats.sentence_count
+    if not words or not sentences:
+        return {'error': 'Not enough text to score readability'}
+    words_per_sentence = words / sentences
+    syllables_per_word = stats.syllable_count / words
+    reading_ease = 206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word
+    return {
+        'flesch_reading_ease': round(reading_ease, 2),
+        'flesch_kincaid_grade': round(0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59, 2),
+        'gunning_fog': round(0.4 * (words_per_sentence + 100 * stats.polysyllable_count / words), 2),
+        'reading_level': _reading_level(reading_ease),
+        'reading_time_seconds': round(words / 200 * 60, 1),
+    }
+
+
+def _names(raw, label) -> list:
+    """Split a comma-separated string or list of names, rejecting anything else"""
+    if raw is None:
+        return []
+    if isinstance(raw, str):
+        raw = raw.split(',')
+    elif not isinstance(raw, list) or not all(isinstance(name, str) for name in raw):
+        raise ValueError(f"{label} must be a comma-separated string or a list of names")
+    return [name.strip() for name in raw if name.strip()]
+
+
+def _param_key(value):
+    """Hashable form of a request parameter for the cache key"""
+    if isinstance(value, list):
+        return tuple(_param_key(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _param_key(item)) for key, item in value.items()))
+    return value
+
+
+@register('analysis')
+def analysis(ctx: TextContext, params: dict) -> dict:
+    text = ctx.text
+    return analysis_result(
+        ctx.stats,
+        len(text),
+        count_non_space(text),
+        text.count('\n') + 1,
+    )
+
+
+TRANSFORMS = {
+    'uppercase': str.upper,
+    'lowercase': str.lower,
+    'title': str.title,
+    'capitalize': str.capitalize,
+    'swapcase': str.swapcase,
+    'reverse': lambda text: text[::-1],
+    'reverse_words': lambda text: ' '.join(reversed(text.split())),
+}
+
+
+@register('transform', params=('transform_type',))
+def transform(ctx: TextContext, params: dict) -> dict:
+    names = _names(params.get('transform_type'), 'transform_type') or ['all']
+    if 'all' in names:
+        names = list(TRANSFORMS)
+    unknown = [name for name in names if name not in TRANSFORMS]
+    if unknown:
+        raise ValueError(f"Unknown transform_type: {', '.join(unknown)}. "
+                         f"Available: {', '.join(TRANSFORMS)}, all")
+    return {name: TRANSFORMS[name](ctx.text) for name in names}
+
+
+@register('validate')
+def validate(ctx: TextContext, params: dict) -> dict:
+    text = ctx.text
+    return {
+        'is_empty': not text.strip(),
+        'is_ascii': text.isascii(),
+        'has_numbers': any(char.isdigit() for char in text),
+        'has_uppercase': any(char.isupper() for char in text),
+        'has_lowercase': any(char.islower() for char in text),
+        'has_special_characters': any(not char.isalnum() and not char.isspace() for char in text),
+        'contains_email': EMAIL_RE.search(text) is not None,
+        'contains_url': URL_RE.search(text) is not None,
+    }
+
+
+@register('readability')
+def readability(ctx: TextContext, params: dict) -> dict:
+    return readability_result(ctx.stats)
+
+
+def result_size(value) -> int:
+    """Approximate memory held by an operation result, in bytes"""
+    if isinstance(value, str):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(result_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(result_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """
+    Thread-safe LRU of operation results, bounded by entry count and by size.
+
+    Results such as transform hold several copies of the text, so the entry
+    count alone does not bound memory.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        size = result_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+    def __len__(self):
+        return len(self._entries)
+
+
+cache = ResultCache(CACHE_SIZE, CACHE_MAX_BYTES)
+
+
+def resolve_operations(raw) -> list:
+    """Expand a comma-separated string or list of names; 'all' means every operation"""
+    names = _names(raw, 'operation') or ['analysis']
+    if 'all' in names:
+        return list(OPERATIONS)
+    unknown = [name for name in names if name not in OPERATIONS]
+    if unknown:
+        raise ValueError(f"Unknown operation: {', '.join(unknown)}. "
+                         f"Available: {', '.join(OPERATIONS)}, all")
+    return list(dict.fromkeys(names))
+
+
+def run_pipeline(text: str, operations, params=None) -> dict:
+    """
+    Run the requested operations over text.
+
+    Returns {'results': {operation: result}, 'cached': [operations served from cache]}.
+    """
+    params = params or {}
+    names = resolve_operations(operations)
+    cacheable = len(text) <= CACHE_MAX_CHARS
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest() if cacheable else None
+    ctx = TextContext(text)
+    results = {}
+    cached = []
+    for name in names:
+        func, param_names = OPERATIONS[name]
+        key = (digest, name, tuple(_param_key(params.get(param)) for param in param_names))
+        result = cache.get(key) if cacheable else None
+        if result is None:
+            result = func(ctx, params)
+            if cacheable:
+                cache.put(key, result)
+        else:
+            cached.append(name)
+        results[name] = result
+    return {'results': results, 'cached': cached}
+
+
+class StreamingAnalyzer:
+    """
+    Incremental analysis and readability for text that arrives in byte chunks.
+
+    A partial word at the end of a chunk is carried over to the next one, so
+    tokens split across chunk edges are counted once. Memory stays bounded:
+    once the vocabulary exceeds max_vocabulary, words seen only once are
+    dropped and most_common_words becomes approximate.
+    """
+
+    def __init__(self, encoding='utf-8', max_vocabulary=100000):
+        self.stats = TokenStats()
+        self.max_vocabulary = max_vocabulary
+        self.vocabulary_truncated = False
+        self.byte_count = 0
+        self.character_count = 0
+        self.non_space_count = 0
+        self.newline_count = 0
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self._carry = ''
+
+    # Large chunks are tokenized in pieces so the word list of one piece stays small
+    PIECE_SIZE = 1024 * 1024
+
+    def feed(self, data: bytes):
+        self.byte_count += len(data)
+        view = memoryview(data)
+        for start in range(0, len(data), self.PIECE_SIZE):
+            self._process(self._decoder.decode(view[start:start + self.PIECE_SIZE]), final=False)
+
+    def _process(self, text, final):
+        self.character_count += len(text)
+        self.non_space_count += count_non_space(text)
+        self.newline_count += text.count('\n')
+        text = self._carry + text
+        cut = len(text)
+        if not final:
+            # Hold back a trailing partial word until the next chunk arrives
+            while cut and (text[cut - 1].isalnum() or text[cut - 1] in "'’"):
+                cut -= 1
+        self._carry = text[cut:]
+        self.stats.add(text[:cut])
+        if len(self.stats.frequencies) > self.max_vocabulary:
+            self.stats.frequencies = Counter(
+                {word: count for word, count in self.stats.frequencies.items() if count > 1})
+            self.vocabulary_truncated = True
+
+    def close(self) -> dict:
+        """Flush the last chunk and return the analysis and readability results"""
+        self._process(self._decoder.decode(b'', final=True), final=True)
+        self.stats.finish()
+        analysis_data = analysis_result(self.stats, self.character_count,
+                                        self.non_space_count, self.newline_count + 1)
+        analysis_data['byte_count'] = self.byte_count
+        analysis_data['vocabulary_approximate'] = self.vocabulary_truncated
+        return {'analysis': analysis_data, 'readability': readability_result(self.stats)}
+
+
+__all__ = [
+    "OPERATIONS",
+    "TextContext",
+    "TokenStats",
+    "StreamingAnalyzer",
+    "register",
+    "resolve_operations",
+    "run_pipeline",
+    "cache",
+]
@@ -0,0 +1,215 @@
+"""
+Admission control for the Cloud Run service
+Sheds load early instead of letting requests queue until Cloud Run times them out:
+- per-client token bucket rate limiting (429)
+- adaptive (AIMD) concurrency limit driven by observed latency
+- bounded wait queue with a short timeout (503)
+- /health and /metrics bypass admission entirely
+
+Admission runs as WSGI middleware, so shedding skips Flask entirely. Limits are
+per worker process. gunicorn.conf.py gives gthread workers more threads than
+ADMISSION_MAX_CONCURRENCY + ADMISSION_MAX_QUEUE. It also caps accepted
+connections at the thread count, so a request never waits for a thread before
+it reaches admission. Shed requests are counted in admission_rejected_total,
+not http_requests_total.
+
+Environment variables:
+- RATE_LIMIT_RPS / RATE_LIMIT_BURST: per-client refill rate and bucket size (default 50 / 100; 0 disables)
+- ADMISSION_MAX_CONCURRENCY: upper bound for the adaptive limit (default 8)
+- ADMISSION_MIN_CONCURRENCY: lower bound for the adaptive limit (default 1)
+- ADMISSION_MAX_QUEUE: requests allowed to wait for a slot (default 8)
+- ADMISSION_QUEUE_TIMEOUT_MS: longest wait for a slot before 503 (default 500)
+- ADMISSION_TARGET_LATENCY_MS: latency above which the limit backs off (default 250)
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from werkzeug.wsgi import ClosingIterator
+
+import metrics
+
+PRIORITY_PATHS = frozenset(['/health', '/metrics'])
+
+
+def _env_float(name, default):
+    return float(os.environ.get(name, default))
+
+
+class TokenBucketLimiter:
+    """Per-client token buckets, bounded to the most recently seen clients"""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key: str):
+        """Take one token for key; return (allowed, seconds until a token is available)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / self.rate
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit with a bounded wait queue.
+
+    Each request finishing within the target latency grows the limit by
+    1/limit (about +1 per full window); a slow request shrinks it by
+    `backoff`, at most once per target-latency interval.
+    """
+
+    def __init__(self, min_limit, max_limit, max_queue, queue_timeout,
+                 target_latency, backoff=0.9):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(max_limit)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.in_flight = 0
+        self.waiting = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Return None once a slot is taken, or the rejection reason"""
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return None
+            if self.waiting >= self.max_queue:
+                return 'queue_full'
+            self.waiting += 1
+            try:
+                admitted = self._cond.wait_for(lambda: self.in_flight < int(self.limit),
+                                               timeout=self.queue_timeout)
+            finally:
+                self.waiting -= 1
+            if not admitted:
+                return 'queue_timeout'
+            self.in_flight += 1
+            return None
+
+    def release(self, latency: float):
+        """Free a slot and adapt the limit to the request's latency"""
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if latency > self.target_latency:
+                if now - self._last_decrease >= self.target_latency:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            metrics.CONCURRENCY_LIMIT.set(int(self.limit))
+            self._cond.notify()
+
+
+rate_limiter = TokenBucketLimiter(
+    rate=_env_float('RATE_LIMIT_RPS', 50),
+    burst=_env_float('RATE_LIMIT_BURST', 100),
+)
+concurrency_limiter = AdaptiveConcurrencyLimiter(
+    min_limit=int(_env_float('ADMISSION_MIN_CONCURRENCY', 1)),
+    max_limit=int(_env_float('ADMISSION_MAX_CONCURRENCY', 8)),
+    max_queue=int(_env_float('ADMISSION_MAX_QUEUE', 8)),
+    queue_timeout=_env_float('ADMISSION_QUEUE_TIMEOUT_MS', 500) / 1000,
+    target_latency=_env_float('ADMISSION_TARGET_LATENCY_MS', 250) / 1000,
+)
+metrics.on_process_start(lambda: metrics.CONCURRENCY_LIMIT.set(int(concurrency_limiter.limit)))
+
+
+def client_key(environ) -> str:
+    """
+    Identify the caller.
+
+    Cloud Run's front end appends the peer address to X-Forwarded-For, so
+    only the last entry is trusted; earlier ones are whatever the client sent.
+    """
+    forwarded = environ.get('HTTP_X_FORWARDED_FOR', '')
+    return forwarded.rsplit(',', 1)[-1].strip() or environ.get('REMOTE_ADDR') or 'unknown'
+
+
+# Rejections are answered from prebuilt bytes; shedding has to cost far less than serving
+_REJECTIONS = {
+    reason: (status, json.dumps({'error': 'Service overloaded, retry later', 'reason': reason}).encode('utf-8'))
+    for reason, status in (('rate_limited', '429 Too Many Requests'),
+                           ('queue_full', '503 Service Unavailable'),
+                           ('queue_timeout', '503 Service Unavailable'))
+}
+
+
+def _reject(start_response, reason, retry_after):
+    metrics.ADMISSION_REJECTED.labels(reason).inc()
+    status, body = _REJECTIONS[reason]
+    start_response(status, [
+        ('Content-Type', 'application/json'),
+        ('Content-Length', str(len(body))),
+        ('Retry-After', str(max(1, round(retry_after)))),
+    ])
+    return [body]
+
+
+class AdmissionMiddleware:
+    """
+    WSGI middleware that admits or sheds a request before Flask sees it.
+
+    Rejected requests never build a request context or run any Flask hooks.
+    An admitted request holds its slot until the server closes the response
+    body, so long streams count against the limit. Its latency is measured
+    when the headers are ready, so those streams don't read as overload.
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO') in PRIORITY_PATHS:
+            return self.wsgi_app(environ, start_response)
+        if rate_limiter.rate > 0:
+            allowed, retry_after = rate_limiter.allow(client_key(environ))
+            if not allowed:
+                return _reject(start_response, 'rate_limited', retry_after)
+        reason = concurrency_limiter.acquire()
+        if reason is not None:
+            return _reject(start_response, reason, concurrency_limiter.queue_timeout)
+
+        start = time.perf_counter()
+        latency = []
+
+        def timed_start_response(status, headers, exc_info=None):
+            if not latency:
+                latency.append(time.perf_counter() - start)
+            return start_response(status, headers, exc_info)
+
+        def release():
+            concurrency_limiter.release(latency[0] if latency else time.perf_counter() - start)
+
+        try:
+            body = self.wsgi_app(environ, timed_start_response)
+        except BaseException:
+            release()
+            raise
+        return ClosingIterator(body, release)
+
+
+def init_app(app):
+    """Wrap the app's WSGI callable with admission control"""
+    app.wsgi_app = AdmissionMiddleware(app.wsgi_app)
+    return app
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+JSON serialization benchmark for the demo services
+Compares per-response CPU time of each available JSON backend on the payloads
+returned by the existing Cloud Run endpoints and the text Cloud Function.
+
+Usage:
+    python bench_json.py [--iterations 2000] [--text-size 20000]
+"""
+
+import argparse
+import gzip
+import os
+import time
+
+# Benchmark serialization, not the per-client rate limiter
+os.environ.setdefault('RATE_LIMIT_RPS', '0')
+
+import json_provider
+from main import app
+
+
+ENDPOINTS = [
+    '/',
+    '/health',
+    '/time',
+    '/random?min=1&max=1000&count=100',
+    '/quote',
+    '/weather/London',
+    '/cities',
+    '/math/power/2.0/8.0',
+    '/stats',
+]
+
+
+def collect_payloads(text_size):
+    """Fetch one real payload per endpoint, plus a text function result"""
+    client = app.test_client()
+    payloads = {}
+    for path in ENDPOINTS:
+        with client.get(path) as response:
+            payloads[path] = response.get_json()
+
+    text = ("The quick brown fox jumps over the lazy dog. " * (text_size // 45 + 1))[:text_size]
+    payloads['cloud-function text'] = {
+        "original_text": text,
+        "character_count": len(text),
+        "word_count": len(text.split()),
+        "uppercase": text.upper(),
+        "lowercase": text.lower(),
+        "reversed": text[::-1],
+        "message": "Text processed successfully!"
+    }
+    return payloads
+
+
+def cpu_per_call(func, iterations):
+    """Average CPU time of func() in microseconds"""
+    start = time.process_time_ns()
+    for _ in range(iterations):
+        func()
+    return (time.process_time_ns() - start) / iterations / 1000
+
+
+def available_backends():
+    backends = []
+    for name in ('stdlib', 'orjson', 'msgspec'):
+        try:
+            backends.append(json_provider.load_backend(name))
+        except ImportError:
+            print(f"(skipping {name}: not installed)")
+    return backends
+
+
+def bench_serializers(payloads, iterations):
+    """Serializer-only cost, compact vs pretty, with and without gzip"""
+    backends = available_backends()
+    header = f"{'payload':<36}{'bytes':>8}" + ''.join(
+        f"{name + ' c':>12}{name + ' p':>12}{name + ' gz':>12}" for name, _, _ in backends)
+    print("\nSerializer CPU time per response (us); c=compact, p=pretty, gz=compact+gzip")
+    print(header)
+    print('-' * len(header))
+    for label, payload in payloads.items():
+        size = len(json_provider.load_backend('stdlib')[1](payload))
+        row = f"{label:<36}{size:>8}"
+        for _, dumps, _ in backends:
+            row += f"{cpu_per_call(lambda: dumps(payload), iterations):>12.1f}"
+            row += f"{cpu_per_call(lambda: dumps(payload, True), iterations):>12.1f}"
+            row += f"{cpu_per_call(lambda: gzip.compress(dumps(payload), json_provider.COMPRESS_LEVEL), iterations):>12.1f}"
+        print(row)
+
+
+def bench_end_to_end(iterations):
+    """Full Flask request CPU time with the default provider vs the fast one"""
+    from flask.json.provider import DefaultJSONProvider
+
+    fast = app.json
+    client = app.test_client()
+    print("\nEnd-to-end Flask CPU time per request (us)")
+    print(f"{'endpoint':<36}{'default':>12}{json_provider.BACKEND:>12}")
+    for path in ENDPOINTS:
+        app.json = DefaultJSONProvider(app)
+        default_us = cpu_per_call(lambda: client.get(path).close(), iterations)
+        app.json = fast
+        fast_us = cpu_per_call(lambda: client.get(path).close(), iterations)
+        print(f"{path:<36}{default_us:>12.1f}{fast_us:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--text-size', type=int, default=20000,
+                        help='characters in the synthetic Cloud Function input')
+    args = parser.parse_args()
+
+    print(f"Active backend: {json_provider.BACKEND}")
+    payloads = collect_payloads(args.text_size)
+    bench_serializers(payloads, args.iterations)
+    bench_end_to_end(max(args.iterations // 10, 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ set -e
 PROJECT_ID=${PROJECT_ID:-"learn-cloud-473302"}
 SERVICE_NAME="simple-demo-api"
 REGION=${REGION:-"us-central1"}
+# Bucket behind the /objects routes (optional)
+OBJECTS_BUCKET=${OBJECTS_BUCKET:-""}
 
 echo "🚀 Deploying Simple Demo API to Google Cloud Run"
 echo "Project ID: $PROJECT_ID"
@@ -35,6 +37,10 @@ gcloud config set project $PROJECT_ID
 echo "🔧 Enabling Cloud Run API..."
 gcloud services enable run.googleapis.com
 
+# Ship the shared bucket-crud helpers in the image
+echo "📦 Copying gcs_crud.py from ../bucket-crud..."
+cp ../bucket-crud/gcs_crud.py .
+
 # Build and push Docker image
 echo "🐳 Building Docker image..."
 IMAGE_NAME="gcr.io/$PROJECT_ID/$SERVICE_NAME"
@@ -53,8 +59,10 @@ gcloud run deploy $SERVICE_NAME \
     --memory 256Mi \
     --cpu 1 \
     --timeout 60 \
-    --concurrency 80 \
+    --concurrency 32 \
     --max-instances 5 \
+    --cpu-boost \
+    --set-env-vars OBJECTS_BUCKET=$OBJECTS_BUCKET \
     --port 8080
 
 # Get service URL
@@ -0,0 +1,64 @@
+"""
+Gunicorn configuration for the Simple Demo API
+Sets up a shared Prometheus directory so /metrics aggregates every worker, and
+preloads the app once in the master so forked workers start serving immediately.
+
+Set PRELOAD_APP=0 to import the app separately in every worker instead.
+"""
+
+import gc
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# Threads let admission.py queue and shed requests in-process. Admitted and
+# queued requests can hold ADMISSION_MAX_CONCURRENCY + ADMISSION_MAX_QUEUE
+# threads; THREAD_HEADROOM more stay free to shed the excess and serve /health
+worker_class = 'gthread'
+_admission_threads = (int(os.environ.get('ADMISSION_MAX_CONCURRENCY', 8))
+                      + int(os.environ.get('ADMISSION_MAX_QUEUE', 8)))
+threads = int(os.environ.get('THREADS', _admission_threads + int(os.environ.get('THREAD_HEADROOM', 8))))
+# gthread hands every readable connection to an unbounded executor queue, where
+# it would wait for a thread before admission could shed it. Accepting no more
+# connections than there are threads means a request always finds one; the rest
+# wait in the listen backlog (or in Cloud Run's front end). Idle keep-alive
+# connections count against the cap, so keep-alive needs WORKER_CONNECTIONS above
+# THREADS, at the cost of up to that many requests waiting for a thread
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', threads))
+keepalive = 2 if worker_connections > threads else 0
+preload_app = os.environ.get('PRELOAD_APP', '1').lower() not in ('0', 'false', 'no')
+
+# Must be set before the app (and prometheus_client) is imported
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus-multiproc')
+_multiproc_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+shutil.rmtree(_multiproc_dir, ignore_errors=True)
+os.makedirs(_multiproc_dir, exist_ok=True)
+
+
+def when_ready(server):
+    """
+    Move everything the preloaded app allocated into the permanent GC generation.
+
+    The collector then never writes to those objects, so the pages the master
+    shares with its workers stay shared after fork (copy-on-write friendly).
+    """
+    if preload_app:
+        gc.freeze()
+        # Gauges the master set while importing the app would be summed with
+        # the workers' as another live process
+        from metrics import mark_process_dead
+        mark_process_dead(os.getpid())
+
+
+def post_fork(server, worker):
+    """Give each preloaded worker its own copy of the per-process gauges"""
+    if preload_app:
+        from metrics import init_worker
+        init_worker()
+
+
+def child_exit(server, worker):
+    """Drop live gauges of workers that exit"""
+    from metrics import mark_process_dead
+    mark_process_dead(worker.pid)
@@ -0,0 +1,300 @@
+"""
+Pluggable JSON serialization for the demo services
+Uses orjson or msgspec when installed and falls back to the stdlib encoder.
+
+This module is shared by cloud-run/ and cloud-function/. This file is the only
+copy: cloud-function/deploy.sh copies it into the function source, and the
+function falls back to importing it from ../cloud-run when run from the repo.
+
+Environment variables:
+- JSON_BACKEND: force a backend ('orjson', 'msgspec', 'stdlib'); default 'auto'
+- JSON_COMPACT: '0' to pretty-print responses by default (default '1')
+- COMPRESS_MIN_SIZE: smallest body in bytes worth compressing (default 1024)
+- COMPRESS_LEVEL: gzip level 1-9 (default 6); brotli uses quality 4
+"""
+
+import json
+import os
+from decimal import Decimal
+
+from flask.json.provider import JSONProvider
+
+COMPRESSIBLE_MIMETYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'text/plain',
+    'text/html',
+    'text/csv',
+)
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+DEFAULT_COMPACT = os.environ.get('JSON_COMPACT', '1').lower() not in ('0', 'false', 'no')
+
+
+def _default(obj):
+    """Fallback for types the fast encoders do not handle natively"""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib_backend():
+    def dumps(obj, pretty=False):
+        if pretty:
+            return json.dumps(obj, indent=2, default=_default).encode('utf-8')
+        return json.dumps(obj, separators=(',', ':'), default=_default).encode('utf-8')
+
+    return 'stdlib', dumps, json.loads
+
+
+def _orjson_backend():
+    import orjson
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    pretty_options = options | orjson.OPT_INDENT_2
+
+    def dumps(obj, pretty=False):
+        return orjson.dumps(obj, default=_default, option=pretty_options if pretty else options)
+
+    return 'orjson', dumps, orjson.loads
+
+
+def _msgspec_backend():
+    import msgspec
+
+    encoder = msgspec.json.Encoder(enc_hook=_default)
+    decoder = msgspec.json.Decoder()
+
+    def dumps(obj, pretty=False):
+        data = encoder.encode(obj)
+        return msgspec.json.format(data, indent=2) if pretty else data
+
+    def loads(data):
+        # msgspec.DecodeError is not a ValueError; callers expect one for bad input
+        try:
+            return decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    return 'msgspec', dumps, loads
+
+
+_BACKENDS = {
+    'orjson': _orjson_backend,
+    'msgspec': _msgspec_backend,
+    'stdlib': _stdlib_backend,
+}
+
+
+def load_backend(name='auto'):
+    """
+    Return (name, dumps, loads) for the requested backend.
+
+    'auto' picks the first installed of orjson, msgspec, stdlib.
+    """
+    if name != 'auto':
+        return _BACKENDS[name]()
+    for candidate in ('orjson', 'msgspec'):
+        try:
+            return _BACKENDS[candidate]()
+        except ImportError:
+            continue
+    return _stdlib_backend()
+
+
+BACKEND, _dumps, loads = load_backend(os.environ.get('JSON_BACKEND', 'auto'))
+
+
+def dumps(obj, pretty=False) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes with the active backend"""
+    return _dumps(obj, pretty)
+
+
+def wants_pretty(request) -> bool:
+    """Pretty-print when asked via ?pretty=1 or when compact output is disabled"""
+    flag = request.args.get('pretty') if request is not None else None
+    if flag is not None:
+        return flag.lower() not in ('0', 'false', 'no')
+    return not DEFAULT_COMPACT
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def negotiate_encoding(request):
+    """
+    Pick a Content-Encoding from the request's Accept-Encoding header.
+
+    Honours q-values; returns 'br', 'gzip' or None for identity.
+    """
+    if request is None:
+        return None
+    offers = ['br', 'gzip'] if _brotli() is not None else ['gzip']
+    return request.accept_encodings.best_match(offers)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress data with the given Content-Encoding"""
+    if encoding == 'br':
+        return _brotli().compress(data, quality=4)
+    import gzip
+    return gzip.compress(data, compresslevel=COMPRESS_LEVEL)
+
+
+def should_compress(body_size, mimetype, status_code, headers) -> bool:
+    """Only compress sizeable, successful, text-like bodies that are not encoded yet"""
+    if body_size is None or body_size < COMPRESS_MIN_SIZE:
+        return False
+    if status_code < 200 or status_code in (204, 206, 304):
+        return False
+    if 'Content-Encoding' in headers:
+        return False
+    return (mimetype or '').split(';')[0].strip() in COMPRESSIBLE_MIMETYPES
+
+
+def _add_vary(headers):
+    vary = headers.get('Vary')
+    if not vary:
+        headers['Vary'] = 'Accept-Encoding'
+    elif 'accept-encoding' not in vary.lower():
+        headers['Vary'] = f"{vary}, Accept-Encoding"
+
+
+def compress_response(response):
+    """
+    Flask after_request hook that compresses buffered responses.
+
+    Streamed responses are passed through untouched so they are never buffered.
+    """
+    from flask import request
+
+    if response.is_streamed or response.direct_passthrough:
+        return response
+    if not should_compress(response.content_length, response.mimetype,
+                           response.status_code, response.headers):
+        return response
+    _add_vary(response.headers)
+    encoding = negotiate_encoding(request)
+    if encoding is None:
+        return response
+    response.set_data(compress(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider backed by the fastest available encoder"""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs) -> str:
+        # Options such as indent or sort_keys are stdlib-specific; honour them there
+        if kwargs:
+            kwargs.setdefault('default', _default)
+            return json.dumps(obj, **kwargs)
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        from flask import has_request_context, request
+
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = wants_pretty(request) if has_request_context() else not DEFAULT_COMPACT
+        return self._app.response_class(dumps(obj, pretty) + b'\n', mimetype=self.mimetype)
+
+
+def init_app(app):
+    """Install the fast provider and response compression on a Flask app"""
+    app.json = FastJSONProvider(app)
+    app.after_request(compress_response)
+    return app
+
+
+def json_response(request, payload, status=200, headers=None):
+    """
+    Build a (body, status, headers) tuple for plain function handlers.
+
+    Applies the same pretty/compact and compression negotiation as init_app.
+    """
+    headers = dict(headers or {})
+    headers['Content-Type'] = 'application/json'
+    body = dumps(payload, wants_pretty(request))
+    if should_compress(len(body), headers['Content-Type'], status, headers):
+        _add_vary(headers)
+        encoding = negotiate_encoding(request)
+        if encoding is not None:
+            body = compress(body, encoding)
+            headers['Content-Encoding'] = encoding
+    return (body, status, headers)
+
+
+def _batched(chunks, size=16384):
+    """Coalesce small chunks so each streamed write carries a useful payload"""
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield b''.join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _gzip_stream(chunks):
+    import zlib
+
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def ndjson_response(request, records, headers=None):
+    """
+    Stream an iterable of JSON-serializable records as NDJSON.
+
+    Records are serialized one at a time and gzip-compressed on the fly when
+    the client accepts it, so the full response is never held in memory.
+    """
+    from flask import Response
+
+    headers = dict(headers or {})
+    headers['Content-Type'] = 'application/x-ndjson'
+    _add_vary(headers)
+    chunks = _batched(dumps(record) + b'\n' for record in records)
+    if request is not None and request.accept_encodings.best_match(['gzip']) == 'gzip':
+        chunks = _gzip_stream(chunks)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(chunks, headers=headers)
+
+
+__all__ = [
+    "BACKEND",
+    "dumps",
+    "loads",
+    "load_backend",
+    "compress",
+    "compress_response",
+    "negotiate_encoding",
+    "FastJSONProvider",
+    "init_app",
+    "json_response",
+    "ndjson_response",
+]
@@ -3,6 +3,8 @@ Simple Demo API using Google Cloud Run
 This service provides basic functionality without external dependencies
 """
 
+import startup
+
 import os
 import json
 import random
@@ -10,7 +12,21 @@ import math
 from datetime import datetime
 from flask import Flask, request, jsonify
 
+import admission
+import json_provider
+import metrics
+import objects
+import profiler
+import random_stream
+
+startup.mark('imports_done')
+
 app = Flask(__name__)
+metrics.init_app(app)
+admission.init_app(app)
+json_provider.init_app(app)
+profiler.init_app(app)
+objects.init_app(app)
 
 # Sample data for demo purposes
 CITIES = [
@@ -67,11 +83,16 @@ def home():
             '/quote': 'Random inspirational quote',
             '/weather/<city>': 'Fake weather for a city',
             '/cities': 'List of demo cities',
-            '/math/<operation>/<a>/<b>': 'Basic math operations'
+            '/math/<operation>/<a>/<b>': 'Basic math operations',
+            '/stats': 'Process statistics',
+            '/metrics': 'Prometheus metrics',
+            '/startup': 'Startup phase timings',
+            '/objects/<path>': 'Stream objects to (PUT) and from (GET) Cloud Storage'
         },
         'examples': [
             '/time',
             '/random',
+            '/random?count=1000000&format=ndjson&seed=42',
             '/quote',
             '/weather/London',
             '/cities',
@@ -87,7 +108,7 @@ def health():
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
         'service': 'simple-demo-api',
-        'uptime': 'running'
+        'uptime': metrics.uptime_seconds()
     })
 
 
@@ -105,16 +126,32 @@ def get_time():
 
 @app.route('/random')
 def get_random():
-    """Generate random numbers"""
-    min_val = int(request.args.get('min', 1))
-    max_val = int(request.args.get('max', 100))
-    count = int(request.args.get('count', 1))
+    """Generate random numbers, streaming large samples when a format is given"""
+    try:
+        min_val = int(request.args.get('min', 1))
+        max_val = int(request.args.get('max', 100))
+        count = int(request.args.get('count', 1))
+    except ValueError:
+        return jsonify({'error': 'min, max and count must be integers'}), 400
+    stream_format = request.args.get('format')
     
     if min_val >= max_val:
         return jsonify({'error': 'min must be less than max'}), 400
     
+    if stream_format is not None:
+        seed = request.args.get('seed')
+        try:
+            return random_stream.stream_response(
+                app.response_class, min_val, max_val, count, stream_format,
+                int(seed) if seed is not None else None
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    
     if count > 100:
-        return jsonify({'error': 'count cannot exceed 100'}), 400
+        return jsonify({'error': 'count cannot exceed 100; use format=ndjson, int32 or float64 to stream'}), 400
+    if count < 1:
+        return jsonify({'error': 'count must be at least 1'}), 400
     
     numbers = [random.randint(min_val, max_val) for _ in range(count)]
     
@@ -199,6 +236,9 @@ def get_stats():
         'random_number': random.randint(1, 1000),
         'pi': math.pi,
         'e': math.e,
+        'uptime_seconds': metrics.uptime_seconds(),
+        'rss_bytes': metrics.rss_bytes(),
+        'pid': os.getpid(),
         'timestamp': datetime.now().isoformat()
     })
 
@@ -209,7 +249,7 @@ def not_found(error):
         'error': 'Endpoint not found',
         'available_endpoints': [
             '/', '/health', '/time', '/random', '/quote', 
-            '/weather/<city>', '/cities', '/math/<operation>/<a>/<b>', '/stats'
+            '/weather/<city>', '/cities', '/math/<operation>/<a>/<b>', '/stats', '/metrics', '/startup', '/objects/<path>'
         ]
     }), 404
 
@@ -219,6 +259,15 @@ def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
 
+@app.route('/startup')
+def get_startup():
+    """Startup phase timings for this worker"""
+    return jsonify(startup.report())
+
+
+startup.init_app(app)
+
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8080))
     app.run(host='0.0.0.0', port=port, debug=False)
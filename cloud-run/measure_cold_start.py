@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Cold start measurement for the Simple Demo API
+Starts a fresh server (a new container or a local gunicorn), polls /health until
+the first successful response, and reports time-to-first-response over several
+runs together with the server's own /startup phase breakdown.
+
+Usage:
+    python measure_cold_start.py --runs 5                      # local gunicorn
+    python measure_cold_start.py --docker simple-demo-api      # fresh container per run
+    python measure_cold_start.py --env PRELOAD_APP=0           # compare without preload
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+
+def wait_for_first_response(url, timeout):
+    """Poll url until it returns 200; return seconds waited"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.005)
+    raise TimeoutError(f"No response from {url} within {timeout}s")
+
+
+def fetch_json(url):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def start_local(port, env):
+    """Start gunicorn from this directory with the container's configuration"""
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'main:app'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env={**os.environ, 'PORT': str(port), **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def start_docker(image, port, env):
+    """Run a brand-new container so nothing is cached from previous runs"""
+    env_args = [arg for key, value in env.items() for arg in ('-e', f"{key}={value}")]
+    container_id = subprocess.check_output(
+        ['docker', 'run', '-d', '--rm', '-p', f"{port}:8080", *env_args, image],
+        text=True,
+    ).strip()
+    return container_id
+
+
+def measure_once(args, env):
+    base_url = f"http://127.0.0.1:{args.port}"
+    spawn = time.perf_counter()
+    if args.docker:
+        handle = start_docker(args.docker, args.port, env)
+    else:
+        handle = start_local(args.port, env)
+    try:
+        wait_for_first_response(f"{base_url}/health", args.timeout)
+        ttfr = time.perf_counter() - spawn
+        startup = fetch_json(f"{base_url}/startup")
+    finally:
+        if args.docker:
+            subprocess.run(['docker', 'rm', '-f', handle], stdout=subprocess.DEVNULL, check=False)
+        else:
+            handle.terminate()
+            handle.wait()
+    return ttfr, startup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--docker', metavar='IMAGE', help='measure a fresh container of IMAGE')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='extra environment for the server (repeatable)')
+    args = parser.parse_args()
+    env = dict(item.split('=', 1) for item in args.env)
+
+    target = f"container {args.docker}" if args.docker else "local gunicorn"
+    print(f"Measuring cold start of {target} over {args.runs} runs {env or ''}")
+
+    results = []
+    for run in range(1, args.runs + 1):
+        ttfr, startup = measure_once(args, env)
+        results.append(ttfr)
+        print(f"  run {run}: time-to-first-response {ttfr * 1000:.0f}ms  "
+              f"imports {startup['imports_ms']}ms  app init {startup['app_init_ms']}ms  "
+              f"first request {startup['first_request_ms']}ms  "
+              f"(forked after init: {startup['forked_after_init']})")
+        time.sleep(0.5)
+
+    print(f"\ntime-to-first-response: min {min(results) * 1000:.0f}ms  "
+          f"median {statistics.median(results) * 1000:.0f}ms  max {max(results) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Request metrics for the Cloud Run service
+Records per-route latency, in-flight requests, response sizes and status codes,
+plus process uptime and RSS, and exposes them in Prometheus format.
+
+When PROMETHEUS_MULTIPROC_DIR is set (see gunicorn.conf.py) every gunicorn
+worker writes its samples there and /metrics aggregates all live workers.
+Forked workers start with empty gauges, so per-process gauge values are set
+through on_process_start and republished by init_worker after the fork.
+"""
+
+import os
+import time
+
+from flask import Response, g, request
+from prometheus_client import Counter, Gauge, Histogram
+
+PROCESS_START = time.time()
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Time spent handling a request until the response headers are ready',
+    ['method', 'route'],
+)
+REQUEST_COUNT = Counter(
+    'http_requests_total',
+    'Requests handled, by route and status code',
+    ['method', 'route', 'status'],
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes',
+    'Size of response bodies with a known length',
+    ['route'],
+    buckets=(128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+IN_FLIGHT = Gauge(
+    'http_requests_in_flight',
+    'Requests currently being handled',
+    multiprocess_mode='livesum',
+)
+PROCESS_RSS = Gauge(
+    'app_process_resident_memory_bytes',
+    'Resident set size of the serving processes',
+    multiprocess_mode='livesum',
+)
+CONCURRENCY_LIMIT = Gauge(
+    'admission_concurrency_limit',
+    'Current adaptive concurrency limit',
+    multiprocess_mode='livesum',
+)
+ADMISSION_REJECTED = Counter(
+    'admission_rejected_total',
+    'Requests shed by admission control',
+    ['reason'],
+)
+START_TIME = Gauge(
+    'app_process_start_time_seconds',
+    'Unix time the service process started',
+    multiprocess_mode='min',
+)
+
+_process_hooks = []
+
+
+def on_process_start(func):
+    """Set per-process gauges now and again in every worker forked after this"""
+    _process_hooks.append(func)
+    func()
+    return func
+
+
+def init_worker():
+    """Republish per-process gauges; called from gunicorn's post_fork hook"""
+    for func in _process_hooks:
+        func()
+
+
+on_process_start(lambda: START_TIME.set(PROCESS_START))
+
+
+def uptime_seconds() -> float:
+    """Seconds since this process started"""
+    return round(time.time() - PROCESS_START, 3)
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        import resource
+        # ru_maxrss is the peak, in KiB on Linux; good enough off-Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _route():
+    """Use the URL rule, not the raw path, to keep label cardinality bounded"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def _before_request():
+    g._metrics_start = time.perf_counter()
+    g._metrics_in_flight = True
+    IN_FLIGHT.inc()
+
+
+def _after_request(response):
+    if g.pop('_metrics_in_flight', False):
+        # Streamed bodies are still being sent after the request context is gone
+        response.call_on_close(IN_FLIGHT.dec)
+    start = g.pop('_metrics_start', None)
+    if start is None:
+        return response
+    route = _route()
+    REQUEST_LATENCY.labels(request.method, route).observe(time.perf_counter() - start)
+    REQUEST_COUNT.labels(request.method, route, str(response.status_code)).inc()
+    if response.content_length is not None:
+        RESPONSE_SIZE.labels(route).observe(response.content_length)
+    PROCESS_RSS.set(rss_bytes())
+    return response
+
+
+def _teardown_request(exc):
+    # Only reached with the request still counted if after_request never ran
+    if g.pop('_metrics_in_flight', False):
+        IN_FLIGHT.dec()
+
+
+def metrics_view():
+    """Prometheus exposition of all live workers' metrics"""
+    # Exposition is only needed on scrape; keep it off the import path
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+
+    PROCESS_RSS.set(rss_bytes())
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def init_app(app):
+    """
+    Register the metrics hooks and the /metrics route.
+
+    Call before other init_app helpers so sizes are recorded after compression.
+    """
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    return app
+
+
+def mark_process_dead(pid):
+    """
+    Drop a process's live gauges.
+
+    Called from gunicorn's child_exit hook for exited workers, and for the
+    master once it has preloaded the app, since it serves no requests.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
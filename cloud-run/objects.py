@@ -0,0 +1,163 @@
+"""
+Streaming object proxy backed by Google Cloud Storage
+PUT and GET /objects/<path> stream bodies straight to and from OBJECTS_BUCKET
+in fixed-size chunks through the shared bucket-crud helpers, so instance memory
+stays flat regardless of object size. Objects at or above SIGNED_URL_THRESHOLD
+bytes are redirected to a signed URL so their bytes bypass the instance.
+
+Environment variables:
+- OBJECTS_BUCKET: bucket the routes read and write (required)
+- OBJECT_CHUNK_SIZE: bytes per GCS request, multiple of 256 KiB (default 4 MiB)
+- SIGNED_URL_THRESHOLD: redirect objects this large to signed URLs (default 32 MiB; 0 disables)
+- SIGNED_URL_TTL: signed URL lifetime in seconds (default 900)
+"""
+
+import os
+import sys
+
+from flask import current_app, jsonify, redirect, request
+
+OBJECTS_BUCKET = os.environ.get('OBJECTS_BUCKET')
+CHUNK_SIZE = int(os.environ.get('OBJECT_CHUNK_SIZE', 4 * 1024 * 1024))
+SIGNED_URL_THRESHOLD = int(os.environ.get('SIGNED_URL_THRESHOLD', 32 * 1024 * 1024))
+SIGNED_URL_TTL = int(os.environ.get('SIGNED_URL_TTL', 900))
+
+
+def _gcs_crud():
+    """
+    Import the shared bucket-crud helpers lazily, after gunicorn has forked.
+
+    deploy.sh copies gcs_crud.py into the image; when running from the
+    repository the sibling bucket-crud directory is used instead.
+    """
+    try:
+        import gcs_crud
+    except ImportError:
+        sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bucket-crud'))
+        import gcs_crud
+    return gcs_crud
+
+
+def _etag(generation):
+    return f'"{generation}"'
+
+
+def _wants_redirect(size):
+    flag = request.args.get('redirect')
+    if flag is not None:
+        return flag.lower() not in ('0', 'false', 'no')
+    return SIGNED_URL_THRESHOLD > 0 and size is not None and size >= SIGNED_URL_THRESHOLD
+
+
+def get_object(name):
+    """Stream an object, honouring Range and If-None-Match"""
+    if not OBJECTS_BUCKET:
+        return jsonify({'error': 'OBJECTS_BUCKET is not configured'}), 503
+    gcs = _gcs_crud()
+    try:
+        meta = gcs.get_metadata(OBJECTS_BUCKET, name)
+    except FileNotFoundError:
+        return jsonify({'error': 'Object not found', 'name': name}), 404
+
+    size = meta['size']
+    generation = meta['generation']
+    headers = {'ETag': _etag(generation), 'Accept-Ranges': 'bytes'}
+
+    if request.if_none_match.contains_weak(str(generation)):
+        return '', 304, headers
+
+    if _wants_redirect(size):
+        url = gcs.generate_signed_url(OBJECTS_BUCKET, name, generation=generation,
+                                      expiration_seconds=SIGNED_URL_TTL)
+        response = redirect(url, 302)
+        response.headers.update(headers)
+        return response
+
+    start, end, status = 0, size - 1, 200
+    byte_range = request.range
+    # Multi-range requests are answered with the whole object
+    if byte_range is not None and len(byte_range.ranges) == 1:
+        bounds = byte_range.range_for_length(size)
+        if bounds is None:
+            headers['Content-Range'] = f"bytes */{size}"
+            return jsonify({'error': 'Requested range not satisfiable'}), 416, headers
+        start, end, status = bounds[0], bounds[1] - 1, 206
+        headers['Content-Range'] = f"bytes {start}-{end}/{size}"
+
+    length = end - start + 1
+    chunks = gcs.iter_chunks(OBJECTS_BUCKET, name, chunk_size=CHUNK_SIZE, generation=generation,
+                             start=start, end=end) if length > 0 else iter(())
+    response = current_app.response_class(
+        chunks,
+        status=status,
+        headers=headers,
+        content_type=meta['content_type'] or 'application/octet-stream',
+        direct_passthrough=True,
+    )
+    response.content_length = length
+    return response
+
+
+def put_object(name):
+    """
+    Stream the request body into an object.
+
+    If-None-Match: * and If-Match map to generation preconditions and are
+    answered with 412 when not met; conditional uploads are never redirected.
+    """
+    if not OBJECTS_BUCKET:
+        return jsonify({'error': 'OBJECTS_BUCKET is not configured'}), 503
+    from google.api_core.exceptions import PreconditionFailed
+
+    gcs = _gcs_crud()
+    content_type = request.mimetype or 'application/octet-stream'
+
+    if request.if_none_match.star_tag:
+        if_generation_match = 0
+    elif request.if_match:
+        tags = request.if_match.as_set()
+        if len(tags) != 1 or not next(iter(tags)).isdigit():
+            return jsonify({'error': 'If-Match must be a single object generation'}), 400
+        if_generation_match = int(next(iter(tags)))
+    else:
+        if_generation_match = None
+
+    # A signed URL cannot carry If-Match/If-None-Match semantics for the client,
+    # so conditional uploads always stream through the instance
+    if if_generation_match is None and _wants_redirect(request.content_length):
+        url = gcs.generate_signed_url(OBJECTS_BUCKET, name, method='PUT', content_type=content_type,
+                                      expiration_seconds=SIGNED_URL_TTL)
+        # 307 keeps the method and body; clients re-send the upload to GCS directly
+        return redirect(url, 307)
+
+    blob, writer = gcs.open_writer(OBJECTS_BUCKET, name, content_type=content_type,
+                                   chunk_size=CHUNK_SIZE, if_generation_match=if_generation_match)
+    size = 0
+    try:
+        while True:
+            chunk = request.stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            writer.write(chunk)
+            size += len(chunk)
+        writer.close()
+    except PreconditionFailed:
+        return jsonify({'error': 'Object generation does not match precondition'}), 412
+
+    blob.reload()
+    response = jsonify({
+        'uri': f"gs://{OBJECTS_BUCKET}/{name}",
+        'size': size,
+        'generation': blob.generation,
+        'content_type': blob.content_type,
+    })
+    response.status_code = 201
+    response.headers['ETag'] = _etag(blob.generation)
+    return response
+
+
+def init_app(app):
+    """Register the /objects routes"""
+    app.add_url_rule('/objects/<path:name>', 'get_object', get_object, methods=['GET'])
+    app.add_url_rule('/objects/<path:name>', 'put_object', put_object, methods=['PUT'])
+    return app
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Overload test for the Simple Demo API admission control
+Drives open-loop arrival rates past the service's capacity with
+load-testing/loadgen.py and reports, per step, the goodput (successful
+responses within the latency SLO per second), shed requests (429/503), latency,
+and the latency of /health requests mixed in at a fixed rate. Arrivals don't
+wait for responses or honour Retry-After, so the offered load really exceeds
+capacity. With admission control enabled goodput should stay roughly flat once
+capacity is reached instead of collapsing, and /health should stay fast.
+
+Latency is measured from each request's scheduled arrival, so time spent
+waiting for a connection or in the listen backlog counts against the SLO.
+
+Start the service with a small capacity so one machine can overload it:
+    WEB_CONCURRENCY=1 ADMISSION_MAX_CONCURRENCY=4 RATE_LIMIT_RPS=0 \\
+        gunicorn --config gunicorn.conf.py main:app
+    python overload_test.py --rates 400,800,1600,3200 --duration 10
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'load-testing'))
+import loadgen  # noqa: E402
+
+HEALTH_RATE = 10
+
+
+def step_profile(path, rate):
+    """The target path at `rate` plus /health at HEALTH_RATE, as a loadgen profile"""
+    return loadgen.prepare_profile({
+        'name': 'overload',
+        'requests': [
+            {'name': 'target', 'path': path, 'weight': rate},
+            {'name': 'health', 'path': '/health', 'weight': HEALTH_RATE},
+        ],
+    })
+
+
+def run_step(url, path, rate, args):
+    load_args = SimpleNamespace(seed=args.seed, pool_size=args.pool_size, concurrency=None,
+                                rate=rate + HEALTH_RATE, timeout=args.timeout,
+                                warmup=args.warmup, duration=args.duration)
+    return asyncio.run(loadgen.run_load(load_args, step_profile(path, rate), url))
+
+
+def summarize(rate, recorder, elapsed, slo):
+    samples = recorder.samples['target']
+    statuses = recorder.statuses['target']
+    ok_latencies = sorted(latency for latency, ok in samples if ok)
+    good = sum(1 for latency in ok_latencies if latency <= slo)
+    shed = statuses['429'] + statuses['503']
+    errors = len(samples) - len(ok_latencies) - shed
+    health = sorted(latency for latency, _ in recorder.samples['health'])
+
+    def ms(values, q):
+        value = loadgen.percentile(values, q)
+        return value * 1000 if value is not None else float('nan')
+
+    return (f"{rate:>8.0f}{len(samples) / elapsed:>10.1f}{good / elapsed:>11.1f}"
+            f"{shed / elapsed:>10.1f}{errors:>8}"
+            f"{ms(ok_latencies, 50):>10.1f}{ms(ok_latencies, 99):>10.1f}"
+            f"{ms(health, 99):>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--path', default='/random?min=1&max=1000&count=100')
+    parser.add_argument('--rates', default='200,400,800,1600,3200',
+                        help='comma-separated arrival rates (requests per second)')
+    parser.add_argument('--duration', type=float, default=10, help='measured seconds per step')
+    parser.add_argument('--warmup', type=float, default=2, help='seconds of load before measuring')
+    parser.add_argument('--timeout', type=float, default=10, help='per-request timeout in seconds')
+    parser.add_argument('--pool-size', type=int, default=256, help='max open client connections')
+    parser.add_argument('--slo-ms', type=float, default=250, help='latency SLO for goodput')
+    parser.add_argument('--seed', type=int, help='seed for arrival times')
+    args = parser.parse_args()
+
+    slo = args.slo_ms / 1000
+    print(f"Overloading {args.url}{args.path} (SLO {args.slo_ms:.0f}ms, "
+          f"+{HEALTH_RATE}/s /health)")
+    print(f"{'rate/s':>8}{'done/s':>10}{'goodput/s':>11}{'shed/s':>10}{'errors':>8}"
+          f"{'p50 ms':>10}{'p99 ms':>10}{'health p99':>12}")
+    for rate in (float(step) for step in args.rates.split(',')):
+        recorder, elapsed = run_step(args.url, args.path, rate, args)
+        print(summarize(rate, recorder, elapsed, slo), flush=True)
+        time.sleep(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Opt-in sampling profiler for single requests
+With ENABLE_PROFILER=1, adding ?profile=1 to any request samples the handling
+thread's stack and returns the samples in collapsed ("folded") format instead of
+the normal response. The output feeds straight into flamegraph.pl or speedscope.
+
+Environment variables:
+- ENABLE_PROFILER: '1' to allow ?profile=1 (default: disabled)
+- PROFILER_INTERVAL_MS: sampling interval in milliseconds (default: 1)
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import Response, g, request
+
+ENABLED = os.environ.get('ENABLE_PROFILER', '0').lower() in ('1', 'true', 'yes')
+INTERVAL = float(os.environ.get('PROFILER_INTERVAL_MS', 1)) / 1000
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack from a background thread"""
+
+    def __init__(self, thread_id: int, interval: float = INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[self._collapse(frame)] += 1
+            time.sleep(self.interval)
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def folded(self) -> str:
+        """One 'frame;frame;frame count' line per distinct stack"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def _before_request():
+    if request.args.get('profile') == '1':
+        g._profiler = SamplingProfiler(threading.get_ident()).start()
+
+
+def _after_request(response):
+    profiler = g.pop('_profiler', None)
+    if profiler is None:
+        return response
+    profiler.stop()
+    profile = Response(profiler.folded(), mimetype='text/plain')
+    profile.headers['X-Profile-Samples'] = str(sum(profiler.samples.values()))
+    profile.headers['X-Profile-Elapsed-Ms'] = f"{profiler.elapsed * 1000:.2f}"
+    profile.headers['X-Profile-Status'] = str(response.status_code)
+    return profile
+
+
+def init_app(app):
+    """Register the profiling hooks when ENABLE_PROFILER is set"""
+    if ENABLED:
+        app.before_request(_before_request)
+        app.after_request(_after_request)
+    return app
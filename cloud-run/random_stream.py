@@ -0,0 +1,96 @@
+"""
+Streaming random sample generation for /random
+Generates values in fixed-size chunks with NumPy, so memory per request stays
+constant no matter how large `count` is. Every stream is reproducible from its
+seed, which is returned in the X-Random-Seed header.
+
+Formats:
+- ndjson: one integer per line, followed by a summary object line
+- int32: packed little-endian int32 values
+- float64: packed little-endian float64 values, uniform in [min, max)
+"""
+
+import json
+import os
+import secrets
+
+CHUNK_SIZE = int(os.environ.get('RANDOM_STREAM_CHUNK_SIZE', 65536))
+MAX_COUNT = int(os.environ.get('RANDOM_STREAM_MAX_COUNT', 100_000_000))
+INT32_MIN, INT32_MAX = -2 ** 31, 2 ** 31 - 1
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'int32': 'application/octet-stream',
+    'float64': 'application/octet-stream',
+}
+
+
+def validate(min_val, max_val, count, fmt, seed=None):
+    """
+    Raise ValueError with a client-facing message if the request is invalid.
+
+    Runs before the response starts, so nothing can fail after the 200 is sent.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    if seed is not None and seed < 0:
+        raise ValueError('seed must be a non-negative integer')
+    if min_val < INT64_MIN or max_val > INT64_MAX:
+        raise ValueError('min and max must fit in int64')
+    if count < 1:
+        raise ValueError('count must be at least 1')
+    if count > MAX_COUNT:
+        raise ValueError(f"count cannot exceed {MAX_COUNT} when streaming")
+    if fmt == 'int32' and (min_val < INT32_MIN or max_val > INT32_MAX):
+        raise ValueError('min and max must fit in int32 for format=int32')
+
+
+def generate(min_val, max_val, count, fmt, seed):
+    """Yield encoded chunks; sum and average are accumulated per chunk"""
+    # NumPy is only needed for streams; keep it off the startup import path
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    # Sum in int64 only while a full chunk cannot overflow; otherwise use Python ints
+    int64_sum = max(abs(min_val), abs(max_val)) * CHUNK_SIZE <= INT64_MAX
+    total = 0
+    remaining = count
+    while remaining:
+        size = min(CHUNK_SIZE, remaining)
+        if fmt == 'float64':
+            chunk = rng.uniform(min_val, max_val, size)
+            total += float(chunk.sum())
+            yield chunk.astype('<f8', copy=False).tobytes()
+        else:
+            chunk = rng.integers(min_val, max_val, size, endpoint=True, dtype=np.int64)
+            total += int(chunk.sum()) if int64_sum else sum(chunk.tolist())
+            if fmt == 'int32':
+                yield chunk.astype('<i4').tobytes()
+            else:
+                yield ('\n'.join(map(str, chunk.tolist())) + '\n').encode('ascii')
+        remaining -= size
+
+    if fmt == 'ndjson':
+        summary = {
+            'count': count,
+            'min': min_val,
+            'max': max_val,
+            'seed': seed,
+            'sum': total,
+            'average': round(total / count, 2),
+        }
+        yield (json.dumps(summary) + '\n').encode('ascii')
+
+
+def stream_response(response_class, min_val, max_val, count, fmt, seed=None):
+    """Build a streamed response; a seed is drawn and reported if none was given"""
+    validate(min_val, max_val, count, fmt, seed)
+    if seed is None:
+        seed = secrets.randbits(63)
+    response = response_class(generate(min_val, max_val, count, fmt, seed), mimetype=FORMATS[fmt])
+    response.headers['X-Random-Seed'] = str(seed)
+    response.headers['X-Random-Count'] = str(count)
+    if fmt != 'ndjson':
+        response.headers['X-Random-Dtype'] = '<i4' if fmt == 'int32' else '<f8'
+    return response
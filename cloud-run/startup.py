@@ -0,0 +1,73 @@
+"""
+Startup timing for the Cloud Run service
+Splits time-to-first-response into interpreter boot, module imports, app init
+and the first request, and logs the breakdown once per process.
+
+Import this module first in main.py so the import phase is measured.
+"""
+
+import json
+import os
+import sys
+import time
+
+_MARKS = {'import_start': time.time()}
+
+
+def _process_start_time():
+    """Wall-clock start of this process from /proc, or None off-Linux"""
+    try:
+        with open('/proc/self/stat') as stat:
+            # Field 22 is starttime in clock ticks since boot; skip past "(comm)"
+            start_ticks = int(stat.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as uptime:
+            seconds_since_boot = float(uptime.read().split()[0])
+        age = seconds_since_boot - start_ticks / os.sysconf('SC_CLK_TCK')
+        return time.time() - age
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def mark(name: str):
+    """Record the time a startup phase ended"""
+    _MARKS.setdefault(name, time.time())
+
+
+def report() -> dict:
+    """Phase durations in milliseconds for the current process"""
+    process_start = _process_start_time()
+    import_start = _MARKS['import_start']
+    imports_done = _MARKS.get('imports_done')
+    app_ready = _MARKS.get('app_ready')
+    first_response = _MARKS.get('first_response')
+
+    # Workers forked from a preloaded master inherit the marks and start later
+    forked = process_start is not None and app_ready is not None and process_start > app_ready
+
+    def span(start, end):
+        return round((end - start) * 1000, 1) if start and end else None
+
+    return {
+        'pid': os.getpid(),
+        'forked_after_init': forked,
+        'interpreter_ms': None if forked else span(process_start, import_start),
+        'imports_ms': span(import_start, imports_done),
+        'app_init_ms': span(imports_done, app_ready),
+        'first_request_ms': span(process_start if forked else app_ready, first_response),
+        'total_ms': span(process_start or import_start, first_response),
+        'modules_loaded': len(sys.modules),
+    }
+
+
+def _first_response(response):
+    if 'first_response' not in _MARKS:
+        mark('first_response')
+        print(json.dumps({'message': 'startup report', 'startup': report()}), flush=True)
+    return response
+
+
+def init_app(app):
+    """Mark the app as initialized and log the report after its first response"""
+    mark('app_ready')
+    app.after_request(_first_response)
+    return app
@@ -0,0 +1,115 @@
+"""
+Tests for the /objects proxy
+The storage client is replaced with mocks, so no bucket or emulator is needed.
+The real gcs_crud helpers run on top of it.
+
+Run with:
+    python -m pytest test_objects.py
+"""
+
+import unittest
+from unittest import mock
+
+import requests
+from flask import Flask
+from google.resumable_media import InvalidResponse
+
+import objects
+
+gcs_crud = objects._gcs_crud()
+
+
+def http_error(status_code, method='PUT', url='https://storage.googleapis.com/upload'):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = b'{"error": {"message": "conditionNotMet"}}'
+    response.request = requests.Request(method, url).prepare()
+    return response
+
+
+class FailingWriter:
+    """Stands in for BlobWriter: the upload is only sent, and rejected, on close"""
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def write(self, data):
+        return len(data)
+
+    def close(self):
+        raise InvalidResponse(http_error(self.status_code), 'Request failed with status code', self.status_code)
+
+
+class ObjectsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        objects.init_app(self.app)
+        self.client = self.app.test_client()
+        self.storage = mock.MagicMock()
+        self.blob = self.storage.bucket.return_value.blob.return_value
+        patches = [
+            mock.patch.object(objects, 'OBJECTS_BUCKET', 'test-bucket'),
+            mock.patch.object(gcs_crud, '_get_client', return_value=self.storage),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_conflicting_create_returns_412(self):
+        self.blob.open.return_value = FailingWriter(412)
+        response = self.client.put('/objects/report.csv', data=b'a,b\n1,2\n',
+                                   headers={'If-None-Match': '*'})
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(self.blob.open.call_args.kwargs['if_generation_match'], 0)
+
+    def test_conflicting_replace_returns_412(self):
+        self.blob.open.return_value = FailingWriter(412)
+        response = self.client.put('/objects/report.csv', data=b'a,b\n',
+                                   headers={'If-Match': '"1700000000000000"'})
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(self.blob.open.call_args.kwargs['if_generation_match'], 1700000000000000)
+
+    def test_other_upload_errors_are_not_412(self):
+        self.blob.open.return_value = FailingWriter(503)
+        with self.assertLogs(self.app.logger, 'ERROR'):
+            response = self.client.put('/objects/report.csv', data=b'a,b\n')
+        self.assertEqual(response.status_code, 500)
+
+    def test_conditional_upload_is_not_redirected(self):
+        self.blob.open.return_value = FailingWriter(412)
+        with mock.patch.object(objects, 'SIGNED_URL_THRESHOLD', 1):
+            response = self.client.put('/objects/report.csv', data=b'a,b\n',
+                                       headers={'If-None-Match': '*'})
+        self.assertEqual(response.status_code, 412)
+        self.blob.generate_signed_url.assert_not_called()
+
+    def test_range_fetches_only_requested_bytes(self):
+        metadata = {'size': 10 * 1024 * 1024, 'generation': 7, 'content_type': 'text/plain'}
+        self.blob.download_as_bytes.return_value = b'x' * 100
+        with mock.patch.object(gcs_crud, 'get_metadata', return_value=metadata):
+            response = self.client.get('/objects/big.log', headers={'Range': 'bytes=0-99'})
+            body = response.get_data()
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(len(body), 100)
+        self.blob.download_as_bytes.assert_called_once_with(start=0, end=99, checksum=None)
+        self.blob.reload.assert_not_called()
+
+    def test_weak_etag_revalidates(self):
+        metadata = {'size': 10, 'generation': 7, 'content_type': 'text/plain'}
+        with mock.patch.object(gcs_crud, 'get_metadata', return_value=metadata):
+            response = self.client.get('/objects/small.txt', headers={'If-None-Match': 'W/"7"'})
+        self.assertEqual(response.status_code, 304)
+
+    def test_redirect_is_signed_for_the_served_generation(self):
+        metadata = {'size': 10 * 1024 * 1024, 'generation': 7, 'content_type': 'text/plain'}
+        self.blob.generate_signed_url.return_value = 'https://storage.googleapis.com/signed'
+        with mock.patch.object(gcs_crud, 'get_metadata', return_value=metadata), \
+                mock.patch.object(objects, 'SIGNED_URL_THRESHOLD', 1):
+            response = self.client.get('/objects/big.log')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.blob.generate_signed_url.call_args.kwargs['generation'], 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
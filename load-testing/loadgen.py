@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Load generator for the demo services
+Drives a weighted mix of requests from a profile against a running service (or
+one it starts locally) over a pooled keep-alive connector, then prints
+throughput, latency percentiles and error rates as JSON. Passing a previous
+report as --baseline flags regressions and exits non-zero.
+
+Closed loop (--concurrency N): N workers each send the next request as soon as
+the previous one completes, which measures capacity.
+Open loop (--rate R): requests arrive as a Poisson process at R per second
+regardless of how fast the service answers. Latency is measured from the
+scheduled arrival time, so queueing behind a slow service is not hidden.
+
+Usage:
+    python loadgen.py --profile cloud-run --start --concurrency 32 --duration 30
+    python loadgen.py --profile cloud-function --start --rate 200 --duration 30
+    python loadgen.py --profile cloud-run --url https://my-service.run.app --rate 50
+    python loadgen.py --profile cloud-run --start --output results/before.json
+    python loadgen.py --profile cloud-run --start --baseline results/before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+import aiohttp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROFILE_DIR = os.path.join(HERE, 'profiles')
+
+PERCENTILES = (('p50', 50), ('p95', 95), ('p99', 99), ('p99.9', 99.9))
+# Latency percentiles checked against a baseline
+COMPARED_LATENCIES = ('p50', 'p95', 'p99')
+
+
+def load_profile(name_or_path):
+    """Load a profile by name (profiles/<name>.json) or by path"""
+    path = os.path.join(PROFILE_DIR, f"{name_or_path}.json")
+    if not os.path.isfile(path):
+        path = name_or_path
+    with open(path) as f:
+        profile = json.load(f)
+    profile.setdefault('name', os.path.splitext(os.path.basename(path))[0])
+    profile['_dir'] = os.path.dirname(os.path.abspath(path))
+    return prepare_profile(profile)
+
+
+def prepare_profile(profile):
+    """Fill in request defaults and pre-encode bodies of an already loaded profile"""
+    for entry in profile['requests']:
+        entry.setdefault('method', 'GET')
+        entry.setdefault('weight', 1)
+        entry.setdefault('vars', {})
+        bodies = entry.get('json')
+        if bodies is not None and not isinstance(bodies, list):
+            bodies = [bodies]
+        # Bodies are serialized once up front so encoding cost stays out of the measurement
+        entry['_bodies'] = [json.dumps(body).encode('utf-8') for body in bodies] if bodies else None
+    return profile
+
+
+class RequestMix:
+    """Pick requests by weight and fill in their path variables"""
+
+    def __init__(self, entries, seed=None):
+        self.entries = entries
+        self.weights = [entry['weight'] for entry in entries]
+        self.rng = random.Random(seed)
+
+    def next(self):
+        entry = self.rng.choices(self.entries, weights=self.weights)[0]
+        values = {key: self.rng.choice(choices) for key, choices in entry['vars'].items()}
+        path = entry['path'].format(**values)
+        body = self.rng.choice(entry['_bodies']) if entry['_bodies'] else None
+        return entry, path, body
+
+
+class Recorder:
+    """Collects (endpoint, status, latency) samples once the warmup has passed"""
+
+    def __init__(self, measure_from):
+        self.measure_from = measure_from
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = defaultdict(Counter)
+
+    def record(self, entry, scheduled, status, error=None):
+        if scheduled < self.measure_from:
+            return
+        name = entry['name']
+        self.samples[name].append((time.perf_counter() - scheduled, is_success(entry, status)))
+        self.statuses[name][str(status)] += 1
+        if error is not None:
+            self.errors[name][error] += 1
+
+
+def is_success(entry, status):
+    expected = entry.get('expect')
+    if expected:
+        return status in expected
+    return 200 <= status < 400
+
+
+async def send(session, base_url, entry, path, body, recorder, scheduled):
+    headers = dict(entry.get('headers', {}))
+    if body is not None:
+        headers.setdefault('Content-Type', 'application/json')
+    try:
+        async with session.request(entry['method'], base_url + path, data=body, headers=headers) as response:
+            await response.read()
+            recorder.record(entry, scheduled, response.status)
+    except asyncio.TimeoutError:
+        recorder.record(entry, scheduled, 0, 'timeout')
+    except aiohttp.ClientError as e:
+        recorder.record(entry, scheduled, 0, type(e).__name__)
+
+
+async def closed_loop(session, base_url, mix, recorder, concurrency, stop_at):
+    async def worker():
+        while time.perf_counter() < stop_at:
+            entry, path, body = mix.next()
+            await send(session, base_url, entry, path, body, recorder, time.perf_counter())
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def open_loop(session, base_url, mix, recorder, rate, stop_at, rng):
+    """Fire requests at Poisson arrival times; never waits for responses before sending"""
+    tasks = set()
+    next_arrival = time.perf_counter()
+    while next_arrival < stop_at:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        entry, path, body = mix.next()
+        task = asyncio.create_task(send(session, base_url, entry, path, body, recorder, next_arrival))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        next_arrival += rng.expovariate(rate)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def run_load(args, profile, base_url):
+    mix = RequestMix(profile['requests'], args.seed)
+    pool_size = args.pool_size or (args.concurrency if args.rate is None else 256)
+    connector = aiohttp.TCPConnector(limit=pool_size, limit_per_host=0, keepalive_timeout=30)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    start = time.perf_counter()
+    recorder = Recorder(start + args.warmup)
+    stop_at = start + args.warmup + args.duration
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                     headers=profile.get('headers')) as session:
+        if args.rate is None:
+            await closed_loop(session, base_url, mix, recorder, args.concurrency, stop_at)
+        else:
+            await open_loop(session, base_url, mix, recorder, args.rate, stop_at,
+                            random.Random(None if args.seed is None else args.seed + 1))
+    # Open-loop stragglers can finish after stop_at; count the time they took
+    elapsed = max(time.perf_counter(), stop_at) - recorder.measure_from
+    return recorder, elapsed
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(int(-(-q * len(sorted_values) // 100)), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples, statuses, errors, elapsed):
+    latencies = sorted(latency for latency, _ in samples)
+    failed = sum(1 for _, ok in samples if not ok)
+    total = len(samples)
+    latency_ms = {label: round(percentile(latencies, q) * 1000, 3) if latencies else None
+                  for label, q in PERCENTILES}
+    latency_ms['mean'] = round(sum(latencies) / total * 1000, 3) if total else None
+    latency_ms['max'] = round(latencies[-1] * 1000, 3) if latencies else None
+    summary = {
+        'requests': total,
+        'errors': failed,
+        'error_rate': round(failed / total, 5) if total else 0,
+        'throughput_rps': round(total / elapsed, 2) if elapsed > 0 else 0,
+        'latency_ms': latency_ms,
+        'status_counts': dict(sorted(statuses.items())),
+    }
+    if errors:
+        summary['client_errors'] = dict(errors)
+    return summary
+
+
+def build_report(args, profile, base_url, recorder, elapsed):
+    all_samples = [sample for samples in recorder.samples.values() for sample in samples]
+    all_statuses = Counter()
+    all_errors = Counter()
+    for counts in recorder.statuses.values():
+        all_statuses.update(counts)
+    for counts in recorder.errors.values():
+        all_errors.update(counts)
+    return {
+        'profile': profile['name'],
+        'target': base_url,
+        'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'mode': 'closed' if args.rate is None else 'open',
+        'concurrency': args.concurrency if args.rate is None else None,
+        'rate_rps': args.rate,
+        'warmup_s': args.warmup,
+        'duration_s': round(elapsed, 3),
+        'totals': summarize(all_samples, all_statuses, all_errors, elapsed),
+        'endpoints': {
+            entry['name']: summarize(recorder.samples[entry['name']], recorder.statuses[entry['name']],
+                                     recorder.errors[entry['name']], elapsed)
+            for entry in profile['requests'] if recorder.samples[entry['name']]
+        },
+    }
+
+
+def compare(report, baseline, latency_tolerance, throughput_tolerance, error_tolerance):
+    """
+    List regressions of report against baseline.
+
+    Latency percentiles may grow and throughput may shrink by the given
+    relative tolerances; error rates may grow by error_tolerance (absolute).
+    """
+    regressions = []
+
+    def check(scope, current, previous):
+        if not current or not previous:
+            return
+        for label in COMPARED_LATENCIES:
+            now, before = current['latency_ms'].get(label), previous['latency_ms'].get(label)
+            if now is not None and before and now > before * (1 + latency_tolerance):
+                regressions.append({'scope': scope, 'metric': f"latency_ms.{label}",
+                                    'baseline': before, 'current': now,
+                                    'change': round(now / before - 1, 4)})
+        now, before = current['throughput_rps'], previous['throughput_rps']
+        if before and now < before * (1 - throughput_tolerance):
+            regressions.append({'scope': scope, 'metric': 'throughput_rps',
+                                'baseline': before, 'current': now,
+                                'change': round(now / before - 1, 4)})
+        now, before = current['error_rate'], previous['error_rate']
+        if now > before + error_tolerance:
+            regressions.append({'scope': scope, 'metric': 'error_rate',
+                                'baseline': before, 'current': now,
+                                'change': round(now - before, 5)})
+
+    check('totals', report['totals'], baseline.get('totals'))
+    for name, summary in report['endpoints'].items():
+        check(name, summary, baseline.get('endpoints', {}).get(name))
+    return regressions
+
+
+def wait_until_ready(url, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"No response from {url} within {timeout}s")
+
+
+def start_service(profile, port, timeout):
+    """Launch the profile's local server command and wait for its ready path"""
+    start = profile['start']
+    substitutions = {'python': sys.executable, 'port': str(port)}
+    command = [part.format(**substitutions) for part in start['command']]
+    env = {**os.environ, **{key: value.format(**substitutions) for key, value in start.get('env', {}).items()}}
+    process = subprocess.Popen(
+        command,
+        cwd=os.path.normpath(os.path.join(profile['_dir'], start['cwd'])),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(f"http://127.0.0.1:{port}{start.get('ready_path', '/')}", timeout)
+    except TimeoutError:
+        process.terminate()
+        process.wait()
+        raise
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--profile', default='cloud-run', help='profile name in profiles/ or a path')
+    parser.add_argument('--url', help="target base URL (default: the profile's url)")
+    parser.add_argument('--start', action='store_true', help="start the profile's service locally first")
+    parser.add_argument('--port', type=int, default=8090, help='port for --start')
+    parser.add_argument('--concurrency', type=int, default=16, help='closed-loop workers')
+    parser.add_argument('--rate', type=float, help='open-loop arrivals per second (overrides --concurrency)')
+    parser.add_argument('--duration', type=float, default=20, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=3, help='seconds of load before measuring')
+    parser.add_argument('--timeout', type=float, default=30, help='per-request timeout in seconds')
+    parser.add_argument('--pool-size', type=int, help='max open connections (default: concurrency, or 256 open-loop)')
+    parser.add_argument('--seed', type=int, help='seed for the request mix and arrival times')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    parser.add_argument('--baseline', help='previous report to compare against')
+    parser.add_argument('--latency-tolerance', type=float, default=0.15,
+                        help='allowed relative growth of p50/p95/p99 (default 0.15)')
+    parser.add_argument('--throughput-tolerance', type=float, default=0.10,
+                        help='allowed relative drop in throughput (default 0.10)')
+    parser.add_argument('--error-tolerance', type=float, default=0.005,
+                        help='allowed absolute growth of the error rate (default 0.005)')
+    args = parser.parse_args()
+
+    profile = load_profile(args.profile)
+    process = None
+    if args.start:
+        print(f"Starting {profile['name']} on port {args.port}...", file=sys.stderr)
+        process = start_service(profile, args.port, timeout=60)
+        base_url = f"http://127.0.0.1:{args.port}"
+    else:
+        base_url = args.url or profile.get('url', 'http://127.0.0.1:8080')
+    base_url = base_url.rstrip('/')
+
+    mode = f"{args.concurrency} workers" if args.rate is None else f"{args.rate:g} req/s open loop"
+    print(f"Load: {mode} against {base_url} for {args.warmup:g}s warmup + {args.duration:g}s",
+          file=sys.stderr)
+    try:
+        recorder, elapsed = asyncio.run(run_load(args, profile, base_url))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report = build_report(args, profile, base_url, recorder, elapsed)
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report['baseline'] = args.baseline
+        settings = ('mode', 'concurrency', 'rate_rps')
+        if any(baseline.get(key) != report[key] for key in settings):
+            print("Warning: baseline was recorded with different load settings "
+                  f"({', '.join(f'{key}={baseline.get(key)}' for key in settings)})", file=sys.stderr)
+        report['regressions'] = compare(report, baseline, args.latency_tolerance,
+                                        args.throughput_tolerance, args.error_tolerance)
+        exit_code = 1 if report['regressions'] else 0
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    if exit_code:
+        print(f"{len(report['regressions'])} regression(s) against {args.baseline}", file=sys.stderr)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()